@@ -0,0 +1,41 @@
+import django.conf
+
+METRICS_DIR = getattr(django.conf.settings, 'APP_YATUBE_METRICS_DIR', None)
+METRICS_FLUSH_INTERVAL = getattr(
+    django.conf.settings, 'APP_YATUBE_METRICS_FLUSH_INTERVAL', 5
+)
+METRICS_STALE_AFTER = getattr(
+    django.conf.settings, 'APP_YATUBE_METRICS_STALE_AFTER', 60
+)
+METRICS_TOKEN = getattr(django.conf.settings, 'APP_YATUBE_METRICS_TOKEN', None)
+SERVER_TIMING_HEADER = getattr(
+    django.conf.settings, 'APP_YATUBE_SERVER_TIMING_HEADER',
+    'HTTP_X_SERVER_TIMING'
+)
+SERVER_TIMING_MAX_AGE = getattr(
+    django.conf.settings, 'APP_YATUBE_SERVER_TIMING_MAX_AGE', 60 * 60 * 24
+)
+SLOW_QUERY_MS = getattr(django.conf.settings, 'APP_YATUBE_SLOW_QUERY_MS', 100)
+REPEATED_QUERY_THRESHOLD = getattr(
+    django.conf.settings, 'APP_YATUBE_REPEATED_QUERY_THRESHOLD', 10
+)
+PROFILES_DIR = getattr(django.conf.settings, 'APP_YATUBE_PROFILES_DIR', None)
+PROFILE_SAMPLE_RATE = getattr(
+    django.conf.settings, 'APP_YATUBE_PROFILE_SAMPLE_RATE', 0
+)
+PROFILES_KEEP = getattr(django.conf.settings, 'APP_YATUBE_PROFILES_KEEP', 200)
+SHARED_CACHE_TIMEOUT = getattr(
+    django.conf.settings, 'APP_YATUBE_SHARED_CACHE_TIMEOUT', 60 * 10
+)
+CACHE_STALE_TTL = getattr(
+    django.conf.settings, 'APP_YATUBE_CACHE_STALE_TTL', 60
+)
+CACHE_LOCK_TIMEOUT = getattr(
+    django.conf.settings, 'APP_YATUBE_CACHE_LOCK_TIMEOUT', 10
+)
+CACHE_LOCK_WAIT = getattr(
+    django.conf.settings, 'APP_YATUBE_CACHE_LOCK_WAIT', 2
+)
+CACHE_EARLY_REFRESH_BETA = getattr(
+    django.conf.settings, 'APP_YATUBE_CACHE_EARLY_REFRESH_BETA', 1.0
+)
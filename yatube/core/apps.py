@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks, probes, slow_queries
+        checks.install()
+        probes.install()
+        slow_queries.install()
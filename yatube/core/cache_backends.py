@@ -0,0 +1,354 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import memory
+
+GENERATION_KEY = 'tiered:generation'
+_MISSING = object()
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class _Tier:
+    """LRU процесса: общий для всех потоков, как хранилище LocMemCache."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = None
+        self.checked = float('-inf')
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(entry[0])
+
+    def put(self, key, value, ttl):
+        if ttl <= 0:
+            self.discard(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (pickled, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def size(self):
+        with self.lock:
+            return len(self.entries), sum(
+                len(key) + len(pickled)
+                for key, (pickled, _) in self.entries.items()
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else None,
+        }
+
+
+def _tier(name, max_entries):
+    with _tiers_lock:
+        if name not in _tiers:
+            tier = _tiers[name] = _Tier(max_entries)
+            memory.register_cache(f'tiered:{name}', tier.size, tier.stats)
+        return _tiers[name]
+
+
+class TieredCache(BaseCache):
+    """Ограниченный LRU процесса с коротким TTL перед общим кешем.
+
+        CACHES = {
+            'default': {
+                'BACKEND': 'core.cache_backends.TieredCache',
+                'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 5},
+            },
+            'shared': {'BACKEND': '...'},
+        }
+
+    Запись и чтение промахов идут в общий кеш. Ключи у соседей могут
+    устареть не дольше чем на LOCAL_TIMEOUT; о clear() процессы узнают по
+    ключу поколения, который сверяют раз в GENERATION_INTERVAL секунд.
+    Ключи с префиксами SHARED_ONLY_PREFIXES в LRU процесса не попадают:
+    по умолчанию это версии тегов кеша, которые должны быть видны сразу;
+    в настройках туда же добавляют блокировки и то, что читается и
+    переписывается под ними. Ключи, зависящие от тегов, содержат их
+    версии, так что рассылать изменения соседям не нужно.
+    """
+
+    # Попадания и промахи считает общий кеш; локальные — в stats().
+    _probed = True
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.generation_interval = options.get('GENERATION_INTERVAL', 1)
+        self.shared_only_prefixes = tuple(
+            options.get('SHARED_ONLY_PREFIXES', ('tag:',))
+        )
+        self.tier = _tier(
+            location or self.shared_alias, self._max_entries
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _local(self, key):
+        return not str(key).startswith(self.shared_only_prefixes)
+
+    def _put(self, key, value, timeout, version):
+        if self._local(key):
+            self.tier.put(self.make_key(key, version), value, timeout)
+
+    def _sync(self):
+        tier = self.tier
+        now = time.monotonic()
+        if now - tier.checked < self.generation_interval:
+            return
+        tier.checked = now
+        generation = self.shared.get(GENERATION_KEY)
+        if generation != tier.generation:
+            tier.clear()
+            tier.generation = generation
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(entry[0])
+
+    def put(self, key, value, ttl):
+        if ttl <= 0:
+            self.discard(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (pickled, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def size(self):
+        with self.lock:
+            return len(self.entries), sum(
+                len(key) + len(pickled)
+                for key, (pickled, _) in self.entries.items()
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else None,
+        }
+
+
+def _tier(name, max_entries):
+    with _tiers_lock:
+        if name not in _tiers:
+            tier = _tiers[name] = _Tier(max_entries)
+            memory.register_cache(f'tiered:{name}', tier.size, tier.stats)
+        return _tiers[name]
+
+
+class TieredCache(BaseCache):
+    """Ограниченный LRU процесса с коротким TTL перед общим кешем.
+
+        CACHES = {
+            'default': {
+                'BACKEND': 'core.cache_backends.TieredCache',
+                'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 5},
+            },
+            'shared': {'BACKEND': '...'},
+        }
+
+    Запись и чтение промахов идут в общий кеш. Ключи у соседей могут
+    устареть не дольше чем на LOCAL_TIMEOUT; о clear() процессы узнают по
+    ключу поколения, который сверяют раз в GENERATION_INTERVAL секунд.
+    Ключи с префиксами SHARED_ONLY_PREFIXES в LRU процесса не попадают:
+    по умолчанию это версии тегов кеша, которые должны быть видны сразу;
+    в настройках туда же добавляют блокировки и то, что читается и
+    переписывается под ними. Ключи, зависящие от тегов, содержат их
+    версии, так что рассылать изменения соседям не нужно.
+    """
+
+    # Попадания и промахи считает общий кеш; локальные — в stats().
+    _probed = True
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.generation_interval = options.get('GENERATION_INTERVAL', 1)
+        self.shared_only_prefixes = tuple(
+            options.get('SHARED_ONLY_PREFIXES', ('tag:',))
+        )
+        self.tier = _tier(
+            location or self.shared_alias, self._max_entries
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _local(self, key):
+        return not str(key).startswith(self.shared_only_prefixes)
+
+    def _put(self, key, value, timeout, version):
+        if self._local(key):
+            self.tier.put(self.make_key(key, version), value, timeout)
+
+    def _sync(self):
+        tier = self.tier
+        now = time.monotonic()
+        if now - tier.checked < self.generation_interval:
+            return
+        tier.checked = now
+        generation = self.shared.get(GENERATION_KEY)
+        if generation != tier.generation:
+            tier.clear()
+            tier.generation = generation
+
+    def _bump_generation(self):
+        if not self.shared.add(GENERATION_KEY, 1, timeout=None):
+            try:
+                self.shared.incr(GENERATION_KEY)
+            except ValueError:
+                pass
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        if self._local(key):
+            value = self.tier.get(self.make_key(key, version))
+            if value is not _MISSING:
+                return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self._put(key, value, self.local_timeout, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        found = {}
+        missing = []
+        for key in keys:
+            value = _MISSING
+            if self._local(key):
+                value = self.tier.get(self.make_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self._put(key, value, self.local_timeout, version)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._put(key, value, self._ttl(timeout), version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._put(key, value, self._ttl(timeout), version)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._put(key, value, self._ttl(timeout), version)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.tier.discard(self.make_key(key, version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.tier.discard(self.make_key(key, version))
+        self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self.tier.discard(self.make_key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        self.tier.discard(self.make_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.tier.clear()
+        self.shared.clear()
+        # Уникальное значение, а не счётчик: clear() общего кеша удалил
+        # и прежнее поколение.
+        self.shared.set(GENERATION_KEY, time.time_ns(), timeout=None)
@@ -0,0 +1,30 @@
+import time
+
+from django.core.cache import cache
+
+KEY_PREFIX = 'tag:'
+
+
+def key(tag):
+    return f'{KEY_PREFIX}{tag}'
+
+
+def versions(*tags):
+    """Текущие версии тегов. Версия — время последнего изменения, так что
+    её же можно отдавать в Last-Modified. Потерянная из кеша версия
+    заводится заново и только делает зависимые ключи недействительными."""
+    found = cache.get_many([key(tag) for tag in tags])
+    now = time.time()
+    missing = {
+        key(tag): now for tag in tags if key(tag) not in found
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key(tag)] for tag in tags]
+
+
+def touch(*tags):
+    """Помечает теги изменёнными."""
+    now = time.time()
+    cache.set_many({key(tag): now for tag in tags}, timeout=None)
@@ -0,0 +1,28 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+from .cache_backends import TieredCache
+
+
+def shared_cache_check(app_configs, **kwargs):
+    """Версии тегов, дельты и блокировки в LocMemCache видны только
+    своему процессу: с несколькими воркерами страницы и счётчики
+    расходятся."""
+    cache = caches['default']
+    if isinstance(cache, TieredCache):
+        cache = cache.shared
+    if not isinstance(cache, LocMemCache):
+        return []
+    return [Warning(
+        'Общий кеш живёт в памяти процесса.',
+        hint=(
+            'Запускайте один процесс или задайте YATUBE_CACHE_BACKEND и '
+            'YATUBE_CACHE_LOCATION (memcached).'
+        ),
+        id='core.W001',
+    )]
+
+
+def install():
+    register(shared_cache_check, Tags.caches, deploy=True)
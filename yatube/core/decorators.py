@@ -0,0 +1,137 @@
+import hashlib
+from functools import wraps
+
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from . import cache_tags, gzip_pages, holes, stampede
+
+
+def tag_condition(tags_func):
+    """Условный GET по версиям тегов кеша.
+
+    tags_func(request, **kwargs) дёшево, без рендеринга, возвращает теги,
+    от которых зависит страница. ETag учитывает зрителя, так как шапка и
+    кнопки у каждого свои; Last-Modified отдаётся только анонимам.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            tags = tags_func(request, *args, **kwargs)
+            versions = cache_tags.versions(*tags)
+            user = request.user
+            parts = [request.path, request.GET.urlencode(), user.pk]
+            parts.extend(zip(tags, versions))
+            etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+            last_modified = None
+            if not user.is_authenticated:
+                last_modified = int(max(versions, default=0)) or None
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+                patch_vary_headers(response, ['Cookie'])
+                if user.is_authenticated:
+                    patch_cache_control(response, private=True)
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def page_cache(timeout, key_prefix=''):
+    """Кеш целой страницы, общий для всех пользователей.
+
+    Личные куски, отмеченные {% hole %}, хранятся маркерами и заполняются
+    при каждом ответе, поэтому копия не зависит от Cookie. Копия хранится
+    сжатой и отдаётся gzip как есть тем, кто его принимает.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            url = hashlib.md5(request.build_absolute_uri().encode())
+            key = f'page_cache:{key_prefix}:{url.hexdigest()}'
+            built = []
+
+            def build():
+                request._holes = []
+                try:
+                    response = view(request, *args, **kwargs)
+                finally:
+                    page_holes = request.__dict__.pop('_holes')
+                built.append((response, page_holes))
+                if response.streaming or response.status_code != 200:
+                    return None
+                return gzip_pages.CompressedPage(
+                    response.content.decode(response.charset), page_holes,
+                    response['Content-Type'], response.charset,
+                )
+
+            page = stampede.get_or_build(key, build, timeout)
+            if not built:
+                if gzip_pages.accepts_gzip(request):
+                    response = HttpResponse(
+                        page.gzip(request), content_type=page.content_type
+                    )
+                    response['Content-Encoding'] = 'gzip'
+                else:
+                    response = HttpResponse(
+                        page.plain(request), content_type=page.content_type
+                    )
+                patch_vary_headers(response, ['Accept-Encoding'])
+                return response
+            response, page_holes = built[0]
+            if not response.streaming:
+                response.content = holes.fill_page(
+                    response.content.decode(response.charset),
+                    page_holes, request
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def view_cache(tags, per_user=False):
+    """Объявляет общий кеш основного блока страницы (см. base.html).
+
+    tags(request, context) возвращает теги, от которых зависит блок;
+    сигналы моделей сдвигают их версии, и кеш устаревает сразу. Ключ —
+    имя view, аргументы, страница и класс пользователя: аноним или нет,
+    а для per_user — сам пользователь. Личное внутри блока — {% hole %}.
+    View должна вернуть TemplateResponse.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if request.method not in ('GET', 'HEAD') or not isinstance(
+                response, TemplateResponse
+            ):
+                return response
+            context = response.context_data
+            user = request.user
+            context['view_cache'] = {
+                'key': [
+                    request.resolver_match.view_name,
+                    args,
+                    sorted(kwargs.items()),
+                    request.GET.get('page'),
+                    user.pk if per_user else user.is_authenticated,
+                ],
+                'tags': tags(request, context),
+            }
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,112 @@
+"""Хранение страниц с дырами в сжатом виде.
+
+Статические куски страницы сжимаются один раз при записи в кеш, каждый —
+отдельной серией deflate-блоков, выровненной Z_SYNC_FLUSH. Такие серии
+можно склеивать в один поток, поэтому на попадании сжимаются только
+заполненные дыры. Контрольная сумма gzip собирается из сохранённых CRC
+кусков через crc32_combine без распаковки.
+"""
+import re
+import struct
+import zlib
+
+from . import holes
+
+LEVEL = 6
+GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+# Пустой последний блок deflate.
+DEFLATE_END = b'\x03\x00'
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+CRC_POLY = 0xEDB88320
+
+
+def _multmodp(a, b):
+    """Умножение многочленов по модулю CRC-32, как в zlib."""
+    m = 1 << 31
+    p = 0
+    while True:
+        if a & m:
+            p ^= b
+            if a & (m - 1) == 0:
+                break
+        m >>= 1
+        b = (b >> 1) ^ CRC_POLY if b & 1 else b >> 1
+    return p
+
+
+_X2N = [1 << 30]
+for _ in range(31):
+    _X2N.append(_multmodp(_X2N[-1], _X2N[-1]))
+
+
+def _shift(length):
+    """Множитель, сдвигающий CRC на length нулевых байт."""
+    p = 1 << 31
+    k = 3
+    while length:
+        if length & 1:
+            p = _multmodp(_X2N[k & 31], p)
+        length >>= 1
+        k += 1
+    return p
+
+
+def _deflate(data):
+    compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def accepts_gzip(request):
+    return bool(
+        ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    )
+
+
+class CompressedPage:
+    """Страница из page_cache: сжатые статические куски и дыры между ними."""
+
+    def __init__(self, content, page_holes, content_type, charset):
+        self.content_type = content_type
+        self.charset = charset
+        parts = holes.MARKER_RE.split(content)
+        self.holes = [page_holes[int(index)] for index in parts[1::2]]
+        self.segments = []
+        for text in parts[::2]:
+            data = text.encode(charset)
+            self.segments.append((
+                _deflate(data), zlib.crc32(data), len(data), _shift(len(data))
+            ))
+
+    def _filled_holes(self, request):
+        with holes.page_context(request, self.holes) as context:
+            return [
+                holes.render_hole(hole, context).encode(self.charset)
+                for hole in self.holes
+            ] + [b'']
+
+    def gzip(self, request):
+        chunks = [GZIP_HEADER]
+        crc = length = 0
+        filled = self._filled_holes(request)
+        for (deflated, segment_crc, segment_length, shift), data in zip(
+            self.segments, filled
+        ):
+            chunks.append(deflated)
+            crc = _multmodp(shift, crc) ^ segment_crc
+            length += segment_length
+            if data:
+                chunks.append(_deflate(data))
+                crc = zlib.crc32(data, crc)
+                length += len(data)
+        chunks.append(DEFLATE_END)
+        chunks.append(struct.pack('<II', crc, length & 0xffffffff))
+        return b''.join(chunks)
+
+    def plain(self, request):
+        chunks = []
+        filled = self._filled_holes(request)
+        for segment, data in zip(self.segments, filled):
+            inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            chunks.append(inflater.decompress(segment[0]))
+            chunks.append(data)
+        return b''.join(chunks)
@@ -0,0 +1,125 @@
+import hashlib
+import re
+from contextlib import contextmanager
+
+from django.template import Node
+from django.template.context import make_context
+from django.template.loader import get_template
+
+from . import cache_tags, stampede
+from .app_settings import SHARED_CACHE_TIMEOUT
+
+MARKER = '<!--hole:{}-->'
+MARKER_RE = re.compile(r'<!--hole:(\d+)-->')
+
+
+def _punched(context):
+    """Список дыр, если сейчас рендерится общая копия страницы."""
+    holes = context.get('_holes')
+    if holes is None:
+        holes = getattr(context.get('request'), '_holes', None)
+    return holes
+
+
+class HoleNode(Node):
+    """Персональный кусок страницы. В общую копию попадает маркер, а тело
+    рендерится для каждого запроса. Значения из цикла и прочие локальные
+    переменные передаются аргументами: при заполнении их уже нет."""
+
+    def __init__(self, name, kwargs, nodelist):
+        self.name = name
+        self.kwargs = kwargs
+        self.nodelist = nodelist
+
+    def render(self, context):
+        kwargs = {
+            key: value.resolve(context) for key, value in self.kwargs.items()
+        }
+        holes = _punched(context)
+        if holes is None:
+            with context.push(**kwargs):
+                return self.nodelist.render(context)
+        holes.append((self.origin.template_name, self.name, kwargs))
+        return MARKER.format(len(holes) - 1)
+
+
+class SharedCacheNode(Node):
+    """Фрагмент, общий для всех пользователей, с дырами под личное.
+    Если tags задан, но равен None, фрагмент не кешируется."""
+
+    def __init__(self, name, vary_on, tags, nodelist):
+        self.name = name
+        self.vary_on = vary_on
+        self.tags = tags
+        self.nodelist = nodelist
+
+    def render(self, context):
+        tags = []
+        if self.tags:
+            tags = self.tags.resolve(context, ignore_failures=True)
+        if tags is None:
+            return self.nodelist.render(context)
+        vary_on = [value.resolve(context) for value in self.vary_on]
+        key = fragment_key(self.name, vary_on, tags)
+
+        def build():
+            holes = []
+            with context.push(_holes=holes):
+                return self.nodelist.render(context), holes
+
+        fragment = stampede.get_or_build(key, build, SHARED_CACHE_TIMEOUT)
+        return fill(*fragment, context)
+
+
+def _digest(value):
+    return hashlib.md5(repr(value).encode()).hexdigest()
+
+
+def fragment_key(name, vary_on, tags):
+    versions = cache_tags.versions(*tags)
+    return f'shared_cache:{name}:{_digest(vary_on)}:{_digest(versions)}'
+
+
+def _find(template_name, name):
+    template = get_template(template_name).template
+    nodes = getattr(template, '_hole_nodes', None)
+    if nodes is None:
+        nodes = {
+            node.name: node
+            for node in template.nodelist.get_nodes_by_type(HoleNode)
+        }
+        template._hole_nodes = nodes
+    return template, nodes[name]
+
+
+def render_hole(hole, context):
+    template_name, name, kwargs = hole
+    _, node = _find(template_name, name)
+    with context.push(**kwargs):
+        return node.nodelist.render(context)
+
+
+def fill(content, holes, context):
+    if not holes:
+        return content
+    return MARKER_RE.sub(
+        lambda match: render_hole(holes[int(match[1])], context), content
+    )
+
+
+@contextmanager
+def page_context(request, holes):
+    """Контекст для дыр целой страницы: есть только то, что дают
+    контекст-процессоры, и аргументы самих дыр."""
+    context = make_context({}, request)
+    if not holes:
+        yield context
+        return
+    template, _ = _find(*holes[0][:2])
+    with context.bind_template(template):
+        yield context
+
+
+def fill_page(content, holes, request):
+    with page_context(request, holes) as context:
+        return fill(content, holes, context)
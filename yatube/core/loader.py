@@ -0,0 +1,93 @@
+"""Пакетная подгрузка связей в пределах запроса.
+
+Пока запрос обрабатывается, каждый созданный экземпляр подключённых
+моделей запоминается. Первое обращение к непрогруженному внешнему ключу
+(post.author) подтягивает этот ключ сразу для всех запомненных объектов
+той же модели одним запросом IN (...), а карта идентичности не даёт
+загрузить одного и того же автора дважды за запрос.
+"""
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models.fields.related_descriptors import \
+    ForwardManyToOneDescriptor
+from django.db.models.signals import post_init
+
+_local = threading.local()
+
+
+class Scope:
+    def __init__(self):
+        self.instances = defaultdict(list)
+        self.identity = {}
+
+    def register(self, instance):
+        self.instances[type(instance)].append(weakref.ref(instance))
+
+    def _pending(self, field, instance):
+        pending = [instance]
+        for ref in self.instances[type(instance)]:
+            obj = ref()
+            if obj is not None and obj is not instance:
+                pending.append(obj)
+        return [
+            obj for obj in pending
+            if not field.is_cached(obj)
+            and getattr(obj, field.attname) is not None
+        ]
+
+    def load(self, field, instance):
+        pending = self._pending(field, instance)
+        model = field.remote_field.model
+        missing = {
+            getattr(obj, field.attname) for obj in pending
+        } - {pk for cached_model, pk in self.identity if cached_model is model}
+        if missing:
+            for pk, obj in model._base_manager.in_bulk(list(missing)).items():
+                self.identity[(model, pk)] = obj
+        for obj in pending:
+            related = self.identity.get((model, getattr(obj, field.attname)))
+            if related is not None:
+                field.set_cached_value(obj, related)
+
+
+def current():
+    return getattr(_local, 'scope', None)
+
+
+@contextmanager
+def scope():
+    if current() is not None:
+        yield current()
+        return
+    _local.scope = Scope()
+    try:
+        yield _local.scope
+    finally:
+        _local.scope = None
+
+
+def _register(sender, instance, **kwargs):
+    active = current()
+    if active is not None:
+        active.register(instance)
+
+
+class BatchedForwardDescriptor(ForwardManyToOneDescriptor):
+    def __get__(self, instance, cls=None):
+        if instance is not None and not self.field.is_cached(instance):
+            active = current()
+            if active is not None:
+                active.load(self.field, instance)
+        return super().__get__(instance, cls)
+
+
+def install(model, *field_names):
+    for name in field_names:
+        field = model._meta.get_field(name)
+        if field.target_field != field.remote_field.model._meta.pk:
+            raise ValueError(f'{model.__name__}.{name}: нужен ключ на pk')
+        setattr(model, name, BatchedForwardDescriptor(field))
+    post_init.connect(_register, sender=model, weak=False)
@@ -0,0 +1,27 @@
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class QueuedRotatingFileHandler(QueueHandler):
+    """Пишет в ротируемый файл из отдельного потока, не блокируя запрос."""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8'):
+        super().__init__(queue.SimpleQueue())
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        self.target = RotatingFileHandler(
+            filename,
+            maxBytes=maxBytes,
+            backupCount=backupCount,
+            encoding=encoding,
+            delay=True,
+        )
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core import memory
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Гоняет запросы к страницам внутри процесса и показывает, '
+        'какие строки кода наращивают память между снимками tracemalloc'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append', dest='urls',
+            help='Адрес страницы, можно указать несколько раз'
+        )
+        parser.add_argument('--rounds', type=int, default=3)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument(
+            '--username', help='Выполнять запросы от имени пользователя'
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError('Пользователь не найден')
+            client.force_login(user)
+        urls = options['urls'] or ['/']
+        memory.start()
+        try:
+            memory.take_snapshot()
+            for round_number in range(1, options['rounds'] + 1):
+                for _ in range(options['requests']):
+                    for url in urls:
+                        client.get(url)
+                memory.take_snapshot()
+                self.print_round(
+                    round_number, memory.report(options['limit'])
+                )
+        finally:
+            memory.stop()
+
+    def print_round(self, round_number, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Раунд {round_number}: отслежено '
+            f'{report["traced"]["current"] / 1024:.1f} KiB'
+        ))
+        for stat in report['since_previous']:
+            self.stdout.write(
+                f'  {stat["size_diff"] / 1024:+10.1f} KiB '
+                f'{stat["count_diff"]:+8d}  {stat["line"]}'
+            )
+        self.stdout.write('  Кеши:')
+        for name, size in report['caches'].items():
+            self.stdout.write(
+                f'  {name}: {size["entries"]} записей, '
+                f'{size["bytes"] / 1024:.1f} KiB'
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.server_timing import make_token
+
+
+class Command(BaseCommand):
+    help = 'Выдаёт подписанный токен для заголовка X-Server-Timing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Кому выдаётся токен')
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token(options['name']))
@@ -0,0 +1,126 @@
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+MAX_SNAPSHOTS = 10
+_snapshots = []
+_cache_sizers = {}
+_cache_stats = {}
+
+
+def register_cache(name, sizer, stats=None):
+    """Регистрирует кеш процесса: sizer возвращает (записей, байт),
+    необязательный stats — словарь с прочей статистикой."""
+    _cache_sizers[name] = sizer
+    if stats is not None:
+        _cache_stats[name] = stats
+
+
+def _locmem_size(cache, prefix=None):
+    with cache._lock:
+        items = list(cache._cache.items())
+    if prefix is not None:
+        items = [(key, value) for key, value in items if prefix in key]
+    return len(items), sum(len(key) + len(value) for key, value in items)
+
+
+def _django_caches():
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if isinstance(cache, LocMemCache):
+            yield alias, cache
+
+
+def cache_sizes():
+    sizes = {}
+    for alias, cache in _django_caches():
+        sizes[f'django:{alias}'] = _locmem_size(cache)
+    if 'sorl.thumbnail' in settings.INSTALLED_APPS:
+        from sorl.thumbnail.conf import settings as thumbnail_settings
+
+        from .cache_backends import TieredCache
+        cache = caches[thumbnail_settings.THUMBNAIL_CACHE]
+        # Ключи sorl лежат в общем кеше, даже если перед ним TieredCache.
+        if isinstance(cache, TieredCache):
+            cache = cache.shared
+        if isinstance(cache, LocMemCache):
+            sizes['sorl-thumbnail'] = _locmem_size(
+                cache, thumbnail_settings.THUMBNAIL_KEY_PREFIX
+            )
+    for name, sizer in _cache_sizers.items():
+        sizes[name] = sizer()
+    result = {
+        name: {'entries': entries, 'bytes': size}
+        for name, (entries, size) in sizes.items()
+    }
+    for name, stats in _cache_stats.items():
+        result[name].update(stats())
+    return result
+
+
+def start():
+    """Включает трассировку аллокаций; до stop() она замедляет процесс."""
+    if not tracemalloc.is_tracing():
+        _snapshots.clear()
+        tracemalloc.start()
+
+
+def stop():
+    tracemalloc.stop()
+    _snapshots.clear()
+
+
+def take_snapshot():
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    ))
+    _snapshots.append((time.time(), snapshot))
+    del _snapshots[1:-MAX_SNAPSHOTS]
+    return snapshot
+
+
+def _frame(stat):
+    frame = stat.traceback[0]
+    return f'{frame.filename}:{frame.lineno}'
+
+
+def report(limit=20):
+    """Топ аллокаций последнего снимка и их рост с первого и прошлого.
+    Без включённой трассировки — только размеры кешей."""
+    if not tracemalloc.is_tracing():
+        return {'tracing': False, 'caches': cache_sizes()}
+    if not _snapshots:
+        take_snapshot()
+    taken, last = _snapshots[-1]
+    result = {
+        'tracing': True,
+        'taken': taken,
+        'snapshots': len(_snapshots),
+        'traced': dict(zip(('current', 'peak'),
+                           tracemalloc.get_traced_memory())),
+        'top': [
+            {'line': _frame(stat), 'size': stat.size, 'count': stat.count}
+            for stat in last.statistics('lineno')[:limit]
+        ],
+        'caches': cache_sizes(),
+    }
+    for label, index in (('since_first', 0), ('since_previous', -2)):
+        if len(_snapshots) < 2:
+            break
+        result[label] = [
+            {
+                'line': _frame(stat),
+                'size_diff': stat.size_diff,
+                'count_diff': stat.count_diff,
+                'size': stat.size,
+            }
+            for stat in last.compare_to(_snapshots[index][1], 'lineno')[:limit]
+        ]
+    return result
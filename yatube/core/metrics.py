@@ -0,0 +1,219 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import defaultdict
+
+from .app_settings import (METRICS_DIR, METRICS_FLUSH_INTERVAL,
+                           METRICS_STALE_AFTER)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+LATENCY = 'yatube_request_duration_seconds'
+COUNTERS = {
+    'yatube_requests_total': 'Количество обработанных запросов',
+    'yatube_db_queries_total': 'Количество SQL-запросов',
+    'yatube_db_query_seconds_total': 'Суммарное время SQL-запросов',
+    'yatube_cache_hits_total': 'Попадания в кеш',
+    'yatube_cache_misses_total': 'Промахи кеша',
+    'yatube_cache_seconds_total': 'Суммарное время обращений к кешу',
+    'yatube_cache_collapsed_total': (
+        'Запросы, получившие чужую или устаревшую копию вместо пересборки'
+    ),
+    'yatube_cache_early_refresh_total': 'Досрочные обновления записей кеша',
+    'yatube_template_render_seconds_total': 'Суммарное время рендеринга',
+}
+
+# Каждый поток пишет только в свой шард, поэтому запись идёт без блокировок;
+# шарды складываются только при выгрузке метрик. Шарды завершившихся
+# потоков сливаются в _retired, чтобы реестр не рос вместе с числом
+# когда-либо живших потоков.
+_shards = {}
+_retired = defaultdict(float)
+_registry_lock = threading.Lock()
+_local = threading.local()
+# pid переиспользуется, поэтому файл процесса помечен ещё и токеном.
+_token = uuid.uuid4().hex[:8]
+_flusher = None
+
+
+def _retire_dead():
+    for key, (thread, shard) in list(_shards.items()):
+        alive = thread()
+        if alive is None or not alive.is_alive():
+            del _shards[key]
+            for metric, value in shard.copy().items():
+                _retired[metric] += value
+
+
+def _shard():
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = defaultdict(float)
+        with _registry_lock:
+            _retire_dead()
+            _shards[id(shard)] = (
+                weakref.ref(threading.current_thread()), shard
+            )
+        _start_flusher()
+        return shard
+
+
+def observe(view, status, probe):
+    shard = _shard()
+    elapsed = probe.elapsed
+    bucket = bisect.bisect_left(LATENCY_BUCKETS, elapsed)
+    shard[(LATENCY, view, bucket)] += 1
+    shard[(LATENCY + '_sum', view, None)] += elapsed
+    shard[('yatube_requests_total', view, status)] += 1
+    durations, counts = probe.durations, probe.counts
+    shard[('yatube_db_queries_total', view, None)] += counts['db']
+    shard[('yatube_db_query_seconds_total', view, None)] += durations['db']
+    shard[('yatube_cache_hits_total', view, None)] += counts['cache_hit']
+    shard[('yatube_cache_misses_total', view, None)] += counts['cache_miss']
+    shard[('yatube_cache_seconds_total', view, None)] += durations['cache']
+    shard[('yatube_cache_collapsed_total', view, None)] += (
+        counts['cache_collapsed']
+    )
+    shard[('yatube_cache_early_refresh_total', view, None)] += (
+        counts['cache_early_refresh']
+    )
+    shard[('yatube_template_render_seconds_total', view, None)] += (
+        durations['template']
+    )
+
+
+def snapshot():
+    with _registry_lock:
+        _retire_dead()
+        totals = defaultdict(float, _retired)
+        shards = [shard for _, shard in _shards.values()]
+    for shard in shards:
+        for key, value in shard.copy().items():
+            totals[key] += value
+    return totals
+
+
+def _own_path():
+    return os.path.join(
+        METRICS_DIR, f'metrics-{os.getpid()}-{_token}.json'
+    )
+
+
+def flush():
+    if METRICS_DIR is None:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = _own_path()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump([list(key) + [value]
+                   for key, value in snapshot().items()], f)
+    os.replace(tmp_path, path)
+
+
+def _flush_forever():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+def _start_flusher():
+    """Выгрузка идёт в фоновом потоке, а не на пути запроса. Поток
+    заводится при первом замере, так что команды manage.py, не
+    обслуживающие запросы, файлов метрик не пишут."""
+    global _flusher
+    if METRICS_DIR is None or _flusher is not None:
+        return
+    with _registry_lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(
+            target=_flush_forever, name='metrics-flush', daemon=True
+        )
+        _flusher.start()
+    atexit.register(flush)
+
+
+def collect_all():
+    """Метрики текущего процесса плюс снимки остальных воркеров."""
+    totals = snapshot()
+    if METRICS_DIR is None or not os.path.isdir(METRICS_DIR):
+        return totals
+    own_path = _own_path()
+    stale_before = time.time() - METRICS_STALE_AFTER
+    for name in os.listdir(METRICS_DIR):
+        path = os.path.join(METRICS_DIR, name)
+        if not name.endswith('.json') or path == own_path:
+            continue
+        try:
+            # Живые воркеры переписывают свой файл каждые
+            # METRICS_FLUSH_INTERVAL секунд; давно не тронутый файл
+            # остался от завершившегося процесса.
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric, view, label, value in rows:
+            totals[(metric, view, label)] += value
+    return totals
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _histogram_lines(totals):
+    views = sorted({view for name, view, _ in totals if name == LATENCY})
+    yield f'# HELP {LATENCY} Время обработки запроса'
+    yield f'# TYPE {LATENCY} histogram'
+    for view in views:
+        label = f'view="{_escape(view)}"'
+        cumulative = 0
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            cumulative += totals.get((LATENCY, view, index), 0)
+            yield (f'{LATENCY}_bucket{{{label},le="{bound}"}} '
+                   f'{_number(cumulative)}')
+        cumulative += totals.get((LATENCY, view, len(LATENCY_BUCKETS)), 0)
+        yield f'{LATENCY}_bucket{{{label},le="+Inf"}} {_number(cumulative)}'
+        yield f'{LATENCY}_count{{{label}}} {_number(cumulative)}'
+        total = totals.get((LATENCY + '_sum', view, None), 0)
+        yield f'{LATENCY}_sum{{{label}}} {_number(total)}'
+
+
+def _counter_lines(totals):
+    for metric, help_text in COUNTERS.items():
+        yield f'# HELP {metric} {help_text}'
+        yield f'# TYPE {metric} counter'
+        rows = sorted(
+            (view, str(label), value)
+            for (name, view, label), value in totals.items()
+            if name == metric
+        )
+        for view, label, value in rows:
+            labels = f'view="{_escape(view)}"'
+            if label != 'None':
+                labels += f',status="{label}"'
+            yield f'{metric}{{{labels}}} {_number(value)}'
+
+
+def render(totals):
+    lines = list(_histogram_lines(totals)) + list(_counter_lines(totals))
+    return '\n'.join(lines) + '\n'
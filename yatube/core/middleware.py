@@ -0,0 +1,46 @@
+from . import loader, metrics, probes, profiling, server_timing
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with probes.collect(request) as probe:
+            response = self.get_response(request)
+            match = request.resolver_match
+            view = match.view_name if match else '<unresolved>'
+            metrics.observe(view, response.status_code, probe)
+        return response
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with probes.collect(request) as probe:
+            response = self.get_response(request)
+            if server_timing.is_enabled(request):
+                response['Server-Timing'] = server_timing.header_value(probe)
+        return response
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reason = profiling.trigger(request)
+        if reason is None:
+            return self.get_response(request)
+        return profiling.run(self.get_response, request, reason)
+
+
+class BatchLoadingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with loader.scope():
+            return self.get_response(request)
@@ -0,0 +1,145 @@
+import functools
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import import_string
+
+_local = threading.local()
+_MISSING = object()
+
+
+class Probe:
+    """Время и счётчики, накопленные за обработку одного запроса."""
+
+    def __init__(self, request):
+        self.request = request
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.statements = Counter()
+
+    def add(self, kind, duration=0.0, count=1):
+        self.durations[kind] += duration
+        self.counts[kind] += count
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    return getattr(_local, 'probe', None)
+
+
+@contextmanager
+def collect(request):
+    probe = current()
+    if probe is not None:
+        yield probe
+        return
+    probe = _local.probe = Probe(request)
+    try:
+        yield probe
+    finally:
+        _local.probe = None
+
+
+def record(kind, duration=0.0, count=1):
+    probe = current()
+    if probe is not None:
+        probe.add(kind, duration, count)
+
+
+def timed(kind, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if current() is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(kind, time.perf_counter() - started)
+    return wrapper
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    if current() is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record('db', time.perf_counter() - started)
+
+
+def _connection_created(sender, connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def _timed_cache_get(func):
+    @functools.wraps(func)
+    def wrapper(self, key, default=None, version=None):
+        if current() is None:
+            return func(self, key, default, version=version)
+        started = time.perf_counter()
+        value = func(self, key, _MISSING, version=version)
+        record('cache', time.perf_counter() - started, count=0)
+        if value is _MISSING:
+            record('cache_miss')
+            return default
+        record('cache_hit')
+        return value
+    return wrapper
+
+
+def _timed_cache_get_many(func):
+    @functools.wraps(func)
+    def wrapper(self, keys, version=None):
+        if current() is None:
+            return func(self, keys, version=version)
+        keys = list(keys)
+        started = time.perf_counter()
+        values = func(self, keys, version=version)
+        record('cache', time.perf_counter() - started, count=0)
+        record('cache_hit', count=len(values))
+        record('cache_miss', count=len(keys) - len(values))
+        return values
+    return wrapper
+
+
+def _instrument_cache_backends():
+    backends = {
+        import_string(params['BACKEND'])
+        for params in settings.CACHES.values()
+    }
+    for backend in backends:
+        if '_probed' in vars(backend):
+            continue
+        backend.get = _timed_cache_get(backend.get)
+        backend.get_many = _timed_cache_get_many(backend.get_many)
+        backend._probed = True
+
+
+def _instrument(cls, method, kind):
+    if '_probed' in vars(cls):
+        return
+    setattr(cls, method, timed(kind, getattr(cls, method)))
+    cls._probed = True
+
+
+def install():
+    from django.template.backends.django import Template
+
+    connection_created.connect(_connection_created)
+    _instrument(Template, 'render', 'template')
+    _instrument_cache_backends()
+    if apps.is_installed('sorl.thumbnail'):
+        from sorl.thumbnail.base import ThumbnailBackend
+        _instrument(ThumbnailBackend, 'get_thumbnail', 'thumbnail')
@@ -0,0 +1,97 @@
+import cProfile
+import itertools
+import json
+import os
+import re
+import time
+import uuid
+
+from .app_settings import PROFILE_SAMPLE_RATE, PROFILES_DIR, PROFILES_KEEP
+
+TRIGGER_PARAM = 'prof'
+TRIGGER_HEADER = 'HTTP_X_PROFILE'
+PROFILE_NAME = re.compile(r'^[\w.-]+\.prof$')
+
+_requests = itertools.count()
+
+
+def trigger(request):
+    """Причина профилирования запроса или None."""
+    if PROFILES_DIR is None:
+        return None
+    if TRIGGER_PARAM in request.GET or TRIGGER_HEADER in request.META:
+        if request.user.is_staff:
+            return 'manual'
+    if PROFILE_SAMPLE_RATE and next(_requests) % PROFILE_SAMPLE_RATE == 0:
+        return 'sample'
+    return None
+
+
+def run(get_response, request, reason):
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    response = profiler.runcall(get_response, request)
+    duration = time.perf_counter() - started
+    match = request.resolver_match
+    view = match.view_name if match else '<unresolved>'
+    # Имена сортируются по времени для _cleanup(); микросекунды и
+    # случайный хвост не дают профилям одной секунды затереть друг друга.
+    now = time.time()
+    name = '{}-{:06d}-{}-{}-{}.prof'.format(
+        time.strftime('%Y%m%d-%H%M%S', time.localtime(now)),
+        int(now % 1 * 1_000_000),
+        re.sub(r'[^\w.-]', '_', view),
+        os.getpid(),
+        uuid.uuid4().hex[:8],
+    )
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    path = os.path.join(PROFILES_DIR, name)
+    profiler.dump_stats(path)
+    with open(f'{path}.json', 'w') as f:
+        json.dump({
+            'name': name,
+            'view': view,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'user': request.user.get_username(),
+            'trigger': reason,
+            'created': time.time(),
+        }, f, ensure_ascii=False)
+    _cleanup()
+    return response
+
+
+def _cleanup():
+    names = sorted(
+        name for name in os.listdir(PROFILES_DIR) if PROFILE_NAME.match(name)
+    )
+    for name in names[:-PROFILES_KEEP]:
+        for path in (name, f'{name}.json'):
+            try:
+                os.remove(os.path.join(PROFILES_DIR, path))
+            except FileNotFoundError:
+                pass
+
+
+def profile_path(name):
+    if PROFILES_DIR is None or not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(PROFILES_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def listing():
+    if PROFILES_DIR is None or not os.path.isdir(PROFILES_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILES_DIR):
+        if not name.endswith('.prof.json'):
+            continue
+        try:
+            with open(os.path.join(PROFILES_DIR, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda meta: meta['created'], reverse=True)
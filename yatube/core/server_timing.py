@@ -0,0 +1,52 @@
+from django.core import signing
+
+from .app_settings import SERVER_TIMING_HEADER, SERVER_TIMING_MAX_AGE
+
+SALT = 'core.server_timing'
+METRICS = (
+    ('db', 'SQL'),
+    ('cache', 'Cache'),
+    ('template', 'Template'),
+    ('thumbnail', 'Thumbnail'),
+)
+
+
+def make_token(name):
+    return signing.TimestampSigner(salt=SALT).sign(name)
+
+
+def has_valid_token(request):
+    token = request.META.get(SERVER_TIMING_HEADER)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=SERVER_TIMING_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def is_enabled(request):
+    if has_valid_token(request):
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+def header_value(probe):
+    entries = []
+    for kind, description in METRICS:
+        count = probe.counts.get(kind)
+        if kind == 'cache':
+            count = (probe.counts.get('cache_hit', 0)
+                     + probe.counts.get('cache_miss', 0))
+        if not count:
+            continue
+        duration = probe.durations[kind] * 1000
+        entries.append(
+            f'{kind};dur={duration:.2f};desc="{description} ({count})"'
+        )
+    entries.append(f'total;dur={probe.elapsed * 1000:.2f};desc="Total"')
+    return ', '.join(entries)
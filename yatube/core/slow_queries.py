@@ -0,0 +1,107 @@
+import functools
+import json
+import logging
+import re
+import sys
+import time
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from . import probes
+from .app_settings import REPEATED_QUERY_THRESHOLD, SLOW_QUERY_MS
+
+logger = logging.getLogger('yatube.slow_queries')
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_MAX_PARAM_LENGTH = 50
+_SKIP_FILES = (__file__, probes.__file__)
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(sql):
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _LITERAL.sub('?', sql).replace('%s', '?')
+
+
+def _normalize_params(params):
+    if params is None:
+        return None
+    normalized = []
+    for value in params:
+        value = repr(value)
+        if len(value) > _MAX_PARAM_LENGTH:
+            value = value[:_MAX_PARAM_LENGTH] + '…'
+        normalized.append(value)
+    return normalized
+
+
+def _template_origin(frame):
+    """Ближайший узел шаблона в стеке: имя шаблона и строка."""
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+def _code_origin(frame):
+    """Ближайшая строка кода проекта, откуда пришёл запрос к БД."""
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(settings.BASE_DIR)
+                and 'site-packages' not in filename
+                and filename not in _SKIP_FILES):
+            return f'{filename[len(settings.BASE_DIR) + 1:]}:{frame.f_lineno}'
+        frame = frame.f_back
+    return None
+
+
+def _log(message, sql, params, duration, probe, **extra):
+    frame = sys._getframe(2)
+    view = None
+    if probe is not None and probe.request.resolver_match is not None:
+        view = probe.request.resolver_match.view_name
+    entry = {
+        'event': message,
+        'duration_ms': round(duration * 1000, 2),
+        'sql': fingerprint(sql),
+        'params': _normalize_params(params),
+        'view': view,
+        'path': probe.request.path if probe is not None else None,
+        'template': _template_origin(frame),
+        'code': _code_origin(frame),
+    }
+    entry.update(extra)
+    logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        probe = probes.current()
+        if duration * 1000 >= SLOW_QUERY_MS:
+            _log('slow_query', sql, params, duration, probe)
+        if probe is not None:
+            key = fingerprint(sql)
+            probe.statements[key] += 1
+            if probe.statements[key] == REPEATED_QUERY_THRESHOLD:
+                _log('repeated_query', sql, params, duration, probe,
+                     count=REPEATED_QUERY_THRESHOLD)
+
+
+def _connection_created(sender, connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def install():
+    connection_created.connect(_connection_created)
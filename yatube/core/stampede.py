@@ -0,0 +1,65 @@
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+from . import probes
+from .app_settings import (CACHE_EARLY_REFRESH_BETA, CACHE_LOCK_TIMEOUT,
+                           CACHE_LOCK_WAIT, CACHE_STALE_TTL)
+
+POLL_INTERVAL = 0.05
+
+
+def _is_fresh(expires, cost):
+    """Вероятностное раннее обновление: чем ближе срок и чем дороже
+    пересборка, тем вероятнее, что запись обновят заранее. Случайность
+    разносит обновления разных воркеров во времени."""
+    jitter = -cost * CACHE_EARLY_REFRESH_BETA * math.log(1 - random.random())
+    return time.time() + jitter < expires
+
+
+def _wait(key):
+    deadline = time.monotonic() + CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_build(key, build, timeout):
+    """Значение из кеша с защитой от лавины промахов.
+
+    Пересобирает запись только тот запрос, который взял аренду; остальные
+    получают устаревшую копию, а если её нет — ждут готовую. Запись живёт
+    в кеше на CACHE_STALE_TTL дольше своего срока как раз ради этого.
+    build() возвращает None, если результат кешировать нельзя.
+    """
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry[1], entry[2]):
+        return entry[0]
+    lock_key = f'{key}:lock'
+    leased = cache.add(lock_key, True, CACHE_LOCK_TIMEOUT)
+    if not leased:
+        if entry is None:
+            entry = _wait(key)
+        if entry is not None:
+            probes.record('cache_collapsed')
+            return entry[0]
+    elif entry is not None and entry[1] > time.time():
+        probes.record('cache_early_refresh')
+    try:
+        started = time.perf_counter()
+        value = build()
+        cost = time.perf_counter() - started
+        if value is not None:
+            cache.set(
+                key, (value, time.time() + timeout, cost),
+                timeout + CACHE_STALE_TTL
+            )
+    finally:
+        if leased:
+            cache.delete(lock_key)
+    return value
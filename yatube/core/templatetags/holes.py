@@ -0,0 +1,45 @@
+from django import template
+from django.template.base import token_kwargs
+
+from ..holes import HoleNode, SharedCacheNode
+
+register = template.Library()
+
+
+def _name(bits):
+    if len(bits) < 2 or bits[1][0] not in '\'"' or bits[1][0] != bits[1][-1]:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]!r} ожидает имя в кавычках первым аргументом'
+        )
+    return bits[1][1:-1]
+
+
+@register.tag
+def hole(parser, token):
+    """{% hole 'имя' ключ=значение ... %}...{% endhole %}"""
+    bits = token.split_contents()
+    name = _name(bits)
+    rest = bits[2:]
+    kwargs = token_kwargs(rest, parser)
+    if rest:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]!r} принимает только именованные аргументы'
+        )
+    nodelist = parser.parse(('endhole',))
+    parser.delete_first_token()
+    return HoleNode(name, kwargs, nodelist)
+
+
+@register.tag
+def shared_cache(parser, token):
+    """{% shared_cache 'имя' [значение ...] [tags=список] %}...
+    {% endshared_cache %}"""
+    bits = token.split_contents()
+    name = _name(bits)
+    tags = None
+    if bits[-1].startswith('tags='):
+        tags = parser.compile_filter(bits.pop()[len('tags='):])
+    vary_on = [parser.compile_filter(bit) for bit in bits[2:]]
+    nodelist = parser.parse(('endshared_cache',))
+    parser.delete_first_token()
+    return SharedCacheNode(name, vary_on, tags, nodelist)
@@ -0,0 +1,105 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core import memory
+from core.checks import shared_cache_check
+
+
+def tiered(location, **options):
+    return {
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'LOCATION': location,
+        'OPTIONS': {'SHARED': 'shared', 'GENERATION_INTERVAL': 0, **options},
+    }
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-shared',
+    },
+    'first': tiered('first-process'),
+    'second': tiered('second-process'),
+    'small': tiered('small', MAX_ENTRIES=2),
+    'locked': tiered('locked-process', SHARED_ONLY_PREFIXES=('lock:',)),
+})
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['first'].clear()
+        for alias in ('first', 'second', 'small', 'locked'):
+            caches[alias].tier.clear()
+            caches[alias]._sync()
+
+    def test_hot_key_served_from_process_tier(self):
+        first = caches['first']
+        first.set('key', 'значение')
+        caches['shared'].set('key', 'изменено в обход')
+        self.assertEqual(first.get('key'), 'значение')
+        self.assertEqual(caches['second'].get('key'), 'изменено в обход')
+
+    def test_tag_versions_fresh_without_flushing_tier(self):
+        first, second = caches['first'], caches['second']
+        first.set('tag:posts', 1)
+        first.set('other', 1)
+        self.assertEqual(second.get_many(['tag:posts', 'other']), {
+            'tag:posts': 1, 'other': 1,
+        })
+        first.set_many({'tag:posts': 2, 'other': 2})
+        self.assertEqual(second.get_many(['tag:posts', 'other']), {
+            'tag:posts': 2, 'other': 1,
+        })
+
+    def test_clear_flushes_other_processes(self):
+        first, second = caches['first'], caches['second']
+        first.set('other', 1)
+        self.assertEqual(second.get('other'), 1)
+        caches['shared'].set('other', 2)
+        first.clear()
+        self.assertIsNone(second.get('other'))
+
+    def test_shared_only_keys_skip_process_tier(self):
+        locked = caches['locked']
+        locked.set('lock:delta', 1)
+        locked.set('other', 1)
+        caches['shared'].set_many({'lock:delta': 2, 'other': 2})
+        self.assertEqual(locked.get('lock:delta'), 2)
+        self.assertEqual(locked.get_many(['lock:delta', 'other']), {
+            'lock:delta': 2, 'other': 1,
+        })
+
+    def test_tier_is_bounded_lru(self):
+        small = caches['small']
+        small.set('a', 1)
+        small.set('b', 2)
+        small.get('a')
+        small.set('c', 3)
+        self.assertEqual(list(small.tier.entries), [
+            small.make_key('a'), small.make_key('c'),
+        ])
+
+    def test_size_and_hit_rate_stats(self):
+        second = caches['second']
+        caches['first'].set('key', 'значение')
+        second.get('key')
+        second.get('key')
+        stats = memory.cache_sizes()['tiered:second-process']
+        self.assertEqual(stats['entries'], 1)
+        self.assertGreater(stats['bytes'], 0)
+        self.assertIsNotNone(stats['hit_rate'])
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_cache_reported_for_deploy(self):
+        self.assertEqual(
+            [error.id for error in shared_cache_check(None)], ['core.W001']
+        )
+
+    @override_settings(CACHES={
+        'default': tiered('checked', SHARED='shared'),
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    })
+    def test_external_shared_cache_passes(self):
+        self.assertEqual(shared_cache_check(None), [])
@@ -0,0 +1,47 @@
+import gzip
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, User
+
+from core.gzip_pages import CompressedPage
+
+INDEX_URL = reverse('posts:index')
+
+
+class CompressedPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост номер {i} ' * 20)
+            for i in range(10)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_gzip_hit_matches_plain_hit(self):
+        self.guest_client.get(INDEX_URL)
+        for client in (self.guest_client, self.authorized_client):
+            plain = client.get(INDEX_URL)
+            compressed = client.get(INDEX_URL, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertFalse(plain.has_header('Content-Encoding'))
+            self.assertEqual(compressed['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', compressed['Vary'])
+            self.assertEqual(
+                gzip.decompress(compressed.content), plain.content
+            )
+        self.assertContains(plain, 'Пользователь: testuser')
+
+    def test_page_stored_compressed(self):
+        response = self.guest_client.get(INDEX_URL)
+        content = response.content.decode()
+        page = CompressedPage(content, [], 'text/html', 'utf-8')
+        stored = sum(len(segment[0]) for segment in page.segments)
+        self.assertLess(stored, len(response.content) / 2)
+        self.assertEqual(gzip.decompress(page.gzip(None)), response.content)
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Follow, Post, User
+
+INDEX_URL = reverse('posts:index')
+
+
+class HolePunchedCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.edit_url = reverse('posts:post_edit', args=[self.post.id])
+
+    def test_index_shared_between_users(self):
+        response = self.guest_client.get(INDEX_URL)
+        self.assertIsNotNone(response.context)
+        self.assertNotContains(response, 'Новая запись')
+        response = self.author_client.get(INDEX_URL)
+        self.assertIsNone(response.context)
+        self.assertContains(response, 'Пользователь: author')
+        self.assertContains(response, self.edit_url)
+        response = self.reader_client.get(INDEX_URL)
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertNotContains(response, self.edit_url)
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_profile_follow_button_per_user(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        with CaptureQueriesContext(connection) as miss:
+            self.author_client.get(url)
+        with CaptureQueriesContext(connection) as hit:
+            response = self.reader_client.get(url)
+        self.assertLess(len(hit), len(miss))
+        self.assertContains(response, 'Отписаться')
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Подписаться')
+
+    def test_post_detail_comment_form_gets_own_csrf_token(self):
+        url = reverse('posts:post_detail', args=[self.post.id])
+        self.guest_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_shared_fragment_invalidated_by_tags(self):
+        url = reverse('posts:post_detail', args=[self.post.id])
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Изменённый пост'
+        post.save()
+        self.assertContains(self.guest_client.get(url), 'Изменённый пост')
+
+    def test_hole_requires_quoted_name(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template('{% load holes %}{% hole nav %}{% endhole %}')
+
+    def test_hole_renders_inline_outside_cache(self):
+        template = Template(
+            "{% load holes %}{% hole 'greeting' name=user %}"
+            'Привет, {{ name }}{% endhole %}'
+        )
+        self.assertEqual(
+            template.render(Context({'user': 'гость'})), 'Привет, гость'
+        )
@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Group, Post, User
+
+from core import loader
+
+
+class BatchLoaderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(3)
+        ]
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.post = Post.objects.create(
+            author=cls.users[0], text='Тестовый пост', group=cls.group
+        )
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.users[i % 3], text=f'К {i}')
+            for i in range(6)
+        ])
+
+    def test_relations_loaded_in_one_query_per_model(self):
+        with loader.scope():
+            comments = list(Comment.objects.all())
+            with self.assertNumQueries(1):
+                authors = [comment.author for comment in comments]
+            posts = list(Post.objects.all())
+            with self.assertNumQueries(1):
+                self.assertEqual(posts[0].group, self.group)
+            with self.assertNumQueries(0):
+                author = posts[0].author
+            self.assertIn(author, authors)
+            self.assertIs(
+                author, next(a for a in authors if a.pk == author.pk)
+            )
+        self.assertEqual(
+            {author.username for author in authors},
+            {user.username for user in self.users}
+        )
+
+    def test_without_scope_relations_load_one_by_one(self):
+        comments = list(Comment.objects.all())
+        with self.assertNumQueries(len(comments)):
+            for comment in comments:
+                comment.author
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        cache.clear()
+        url = reverse('posts:post_detail', args=[self.post.id])
+        with CaptureQueriesContext(connection) as before:
+            Client().get(url)
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=user, text='Ещё')
+            for user in self.users
+        ])
+        cache.clear()
+        with CaptureQueriesContext(connection) as after:
+            Client().get(url)
+        self.assertEqual(len(after), len(before))
@@ -0,0 +1,58 @@
+import tracemalloc
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import User
+
+from core import memory
+
+MEMORY_URL = reverse('core:memory_report')
+
+
+class MemoryReportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.staff = User.objects.create_user(
+            username='staffuser', is_staff=True
+        )
+
+    def setUp(self):
+        self.addCleanup(tracemalloc.stop)
+        self.addCleanup(memory._snapshots.clear)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_get_does_not_start_tracing(self):
+        response = self.staff_client.get(MEMORY_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.json()['tracing'])
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIn('django:shared', response.json()['caches'])
+
+    def test_tracing_toggled_by_post(self):
+        self.staff_client.post(MEMORY_URL, {'tracing': 'on'})
+        self.assertTrue(tracemalloc.is_tracing())
+        response = self.staff_client.post(MEMORY_URL, {'tracing': 'off'})
+        self.assertFalse(response.json()['tracing'])
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(memory._snapshots, [])
+
+    def test_staff_gets_snapshot_diff_and_cache_sizes(self):
+        self.staff_client.post(MEMORY_URL, {'tracing': 'on'})
+        response = self.staff_client.get(MEMORY_URL, {'limit': 5})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        report = response.json()
+        self.assertEqual(report['snapshots'], 2)
+        self.assertLessEqual(len(report['top']), 5)
+        self.assertIn('since_previous', report)
+        self.assertIn('django:shared', report['caches'])
+        self.assertIn('sorl-thumbnail', report['caches'])
+
+    def test_regular_user_redirected(self):
+        response = self.authorized_client.get(MEMORY_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http import HTTPStatus
+from unittest import mock
+
+from core import metrics
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, User
+
+METRICS_URL = reverse('core:metrics')
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_metrics_exposes_view_latency_and_queries(self):
+        self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.id])
+        )
+        with mock.patch('core.views.METRICS_TOKEN', 'secret'):
+            response = self.guest_client.get(
+                METRICS_URL, HTTP_AUTHORIZATION='Bearer secret'
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        content = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:post_detail",le="+Inf"}',
+            content
+        )
+        self.assertIn(
+            'yatube_requests_total{view="posts:post_detail",status="200"}',
+            content
+        )
+        self.assertIn(
+            'yatube_db_queries_total{view="posts:post_detail"}', content
+        )
+
+    def test_metrics_forbidden_for_external_clients(self):
+        response = self.guest_client.get(
+            METRICS_URL, REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_metrics_need_token_even_from_localhost(self):
+        requests = {
+            None: {'REMOTE_ADDR': '127.0.0.1'},
+            'secret': {'HTTP_AUTHORIZATION': 'Bearer other'},
+        }
+        for token, headers in requests.items():
+            with self.subTest(token=token):
+                with mock.patch('core.views.METRICS_TOKEN', token):
+                    response = self.guest_client.get(METRICS_URL, **headers)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.FORBIDDEN
+                )
+
+    def test_dead_thread_shards_are_retired_but_counted(self):
+        key = ('yatube_requests_total', 'test:view', 200)
+        before = metrics.snapshot()[key]
+
+        def work():
+            metrics._shard()[key] += 1
+
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        self.assertEqual(metrics.snapshot()[key], before + 1)
+        shards = [shard for _, shard in metrics._shards.values()]
+        self.assertTrue(all(key not in shard for shard in shards))
+
+    def test_stale_worker_files_are_pruned(self):
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir, True)
+        key = ['yatube_requests_total', 'test:other', 200]
+        fresh = os.path.join(metrics_dir, 'metrics-1-aaaa.json')
+        stale = os.path.join(metrics_dir, 'metrics-2-bbbb.json')
+        for path in (fresh, stale):
+            with open(path, 'w') as f:
+                json.dump([key + [1]], f)
+        old = time.time() - metrics.METRICS_STALE_AFTER - 1
+        os.utime(stale, (old, old))
+        with mock.patch('core.metrics.METRICS_DIR', metrics_dir):
+            totals = metrics.collect_all()
+        self.assertEqual(totals[tuple(key)], 1)
+        self.assertFalse(os.path.exists(stale))
@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, User
+
+PROFILE_LIST_URL = reverse('core:profile_list')
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.staff = User.objects.create_user(
+            username='staffuser', is_staff=True
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        self.profiles_dir = tempfile.mkdtemp()
+        patcher = mock.patch('core.profiling.PROFILES_DIR', self.profiles_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.profiles_dir, True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.post_detail = reverse('posts:post_detail', args=[self.post.id])
+
+    def test_staff_can_profile_and_download(self):
+        self.staff_client.get(self.post_detail, {'prof': ''})
+        response = self.staff_client.get(PROFILE_LIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        profiles = response.context['profiles']
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['view'], 'posts:post_detail')
+        self.assertEqual(profiles[0]['trigger'], 'manual')
+        response = self.staff_client.get(
+            reverse('core:profile_download', args=[profiles[0]['name']])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_regular_user_cannot_trigger_profiling(self):
+        self.authorized_client.get(self.post_detail, {'prof': ''})
+        response = self.staff_client.get(PROFILE_LIST_URL)
+        self.assertEqual(response.context['profiles'], [])
+        response = self.authorized_client.get(PROFILE_LIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_sampled_requests_profiled(self):
+        with mock.patch('core.profiling.PROFILE_SAMPLE_RATE', 1):
+            self.authorized_client.get(self.post_detail)
+        response = self.staff_client.get(PROFILE_LIST_URL)
+        self.assertEqual(response.context['profiles'][0]['trigger'], 'sample')
+
+    def test_profiles_within_one_second_do_not_collide(self):
+        with mock.patch('core.profiling.time.time', return_value=1e9):
+            self.staff_client.get(self.post_detail, {'prof': ''})
+            self.staff_client.get(self.post_detail, {'prof': ''})
+        response = self.staff_client.get(PROFILE_LIST_URL)
+        self.assertEqual(len(response.context['profiles']), 2)
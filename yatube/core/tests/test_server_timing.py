@@ -0,0 +1,47 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, User
+
+from core.server_timing import make_token
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.staff = User.objects.create_user(
+            username='staffuser', is_staff=True
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.post_detail = reverse('posts:post_detail', args=[self.post.id])
+
+    def test_header_absent_on_regular_requests(self):
+        for client in (self.guest_client, self.authorized_client):
+            with self.subTest(client=client):
+                response = client.get(self.post_detail)
+                self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_header_for_staff(self):
+        response = self.staff_client.get(self.post_detail)
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('template;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_header_for_signed_token(self):
+        response = self.guest_client.get(
+            self.post_detail, HTTP_X_SERVER_TIMING=make_token('dev')
+        )
+        self.assertIn('total;dur=', response['Server-Timing'])
+        response = self.guest_client.get(
+            self.post_detail, HTTP_X_SERVER_TIMING='forged'
+        )
+        self.assertFalse(response.has_header('Server-Timing'))
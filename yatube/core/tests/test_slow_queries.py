@@ -0,0 +1,67 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Group, Post, User
+
+from core.slow_queries import fingerprint
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.user, text=f'Коммент {i}')
+            for i in range(3)
+        ])
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post_detail = reverse('posts:post_detail', args=[self.post.id])
+
+    def get_entries(self, url=None, **patches):
+        with mock.patch.multiple('core.slow_queries', **patches):
+            with self.assertLogs('yatube.slow_queries') as logs:
+                self.guest_client.get(url or self.post_detail)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_slow_query_attributed_to_view_and_template(self):
+        entries = self.get_entries(SLOW_QUERY_MS=0)
+        self.assertTrue(all(
+            entry['event'] == 'slow_query' for entry in entries
+        ))
+        views = {entry['view'] for entry in entries}
+        self.assertIn('posts:post_detail', views)
+        templates = {entry['template'] for entry in entries}
+        self.assertTrue(any(
+            template and template.startswith('posts/comment_list.html:')
+            for template in templates
+        ))
+
+    def test_repeated_query_detected(self):
+        entries = self.get_entries(
+            reverse('posts:group_list', args=[self.group.slug]),
+            REPEATED_QUERY_THRESHOLD=3,
+        )
+        repeated = [
+            entry for entry in entries if entry['event'] == 'repeated_query'
+        ]
+        self.assertTrue(repeated)
+        self.assertEqual(repeated[0]['count'], 3)
+
+    def test_fingerprint_normalizes_parameters(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            'SELECT * FROM t WHERE id IN (...) LIMIT ?'
+        )
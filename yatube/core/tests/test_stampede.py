@@ -0,0 +1,67 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core import probes, stampede
+
+KEY = 'stampede-test'
+
+
+class GetOrBuildTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def build(self, value='свежее', delay=0):
+        def build():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return build
+
+    def test_concurrent_misses_build_once(self):
+        results = []
+        build = self.build(delay=0.2)
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                stampede.get_or_build(KEY, build, 60)
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['свежее'] * 5)
+
+    def test_stale_copy_served_while_leased(self):
+        cache.set(KEY, ('старое', time.time() - 1, 0.1), 60)
+        cache.add(f'{KEY}:lock', True, 10)
+        with probes.collect(None) as probe:
+            value = stampede.get_or_build(KEY, self.build(), 60)
+        self.assertEqual(value, 'старое')
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(probe.counts['cache_collapsed'], 1)
+
+    def test_expired_entry_rebuilt_by_lease_holder(self):
+        cache.set(KEY, ('старое', time.time() - 1, 0.1), 60)
+        value = stampede.get_or_build(KEY, self.build(), 60)
+        self.assertEqual(value, 'свежее')
+        self.assertIsNone(cache.get(f'{KEY}:lock'))
+
+    def test_expensive_entry_refreshed_early(self):
+        cache.set(KEY, ('старое', time.time() + 1, 10.0), 60)
+        with mock.patch('core.stampede.random.random', return_value=0.9):
+            with probes.collect(None) as probe:
+                value = stampede.get_or_build(KEY, self.build(), 60)
+        self.assertEqual(value, 'свежее')
+        self.assertEqual(probe.counts['cache_early_refresh'], 1)
+
+    def test_uncacheable_result_not_stored(self):
+        stampede.get_or_build(KEY, self.build(value=None), 60)
+        stampede.get_or_build(KEY, self.build(value=None), 60)
+        self.assertEqual(self.calls, 2)
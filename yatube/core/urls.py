@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('metrics', views.metrics, name='metrics'),
+    path('admin/memory/', views.memory_report, name='memory_report'),
+    path('admin/profiles/', views.profile_list, name='profile_list'),
+    path(
+        'admin/profiles/<str:name>/',
+        views.profile_download,
+        name='profile_download'
+    ),
+]
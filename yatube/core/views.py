@@ -1,5 +1,15 @@
+import hmac
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseBadRequest, JsonResponse)
 from django.shortcuts import render
 
+from . import memory, profiling
+from . import metrics as metrics_registry
+from .app_settings import METRICS_TOKEN
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +25,63 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def _metrics_token_valid(request):
+    if not METRICS_TOKEN:
+        return False
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(
+        ' '
+    )
+    return scheme.lower() == 'bearer' and hmac.compare_digest(
+        token.encode(), METRICS_TOKEN.encode()
+    )
+
+
+def metrics(request):
+    """Метрики для сборщика с токеном APP_YATUBE_METRICS_TOKEN в
+    заголовке Authorization: Bearer или для персонала. Адрес клиента не
+    проверяется: за обратным прокси он у всех запросов один."""
+    if not (_metrics_token_valid(request) or request.user.is_staff):
+        raise PermissionDenied
+    return HttpResponse(
+        metrics_registry.render(metrics_registry.collect_all()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@staff_member_required
+def profile_list(request):
+    context = {
+        'title': 'Профили запросов',
+        'profiles': profiling.listing(),
+    }
+    return render(request, 'core/profiles.html', context)
+
+
+@staff_member_required
+def profile_download(request, name):
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
+
+
+@staff_member_required
+def memory_report(request):
+    """GET снимает снимок, только если трассировка уже включена;
+    включается и выключается она POST с tracing=on|off."""
+    if request.method == 'POST':
+        tracing = request.POST.get('tracing')
+        if tracing == 'on':
+            memory.start()
+        elif tracing == 'off':
+            memory.stop()
+        else:
+            return HttpResponseBadRequest('tracing: ожидается on или off')
+    memory.take_snapshot()
+    limit = request.GET.get('limit', '')
+    limit = int(limit) if limit.isdigit() else 20
+    return JsonResponse(
+        memory.report(limit), json_dumps_params={'ensure_ascii': False}
+    )
@@ -0,0 +1,182 @@
+import base64
+import hashlib
+from functools import wraps
+from http import HTTPStatus
+
+from core import cache_tags
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.utils.http import quote_etag
+
+from .app_settings import POSTS_PER_PAGE
+
+MAX_LIMIT = 100
+# Поле ответа -> выборка values(); связанные таблицы подтягиваются
+# только если поле запрошено.
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+# Теги, от которых зависят поля из других таблиц.
+FIELD_TAGS = {'author': 'users', 'group': 'groups'}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def encode_cursor(pub_date, post_id):
+    raw = f'{pub_date.isoformat()}|{post_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        pub_date, post_id = raw.decode().split('|')
+        pub_date = parse_datetime(pub_date)
+        post_id = int(post_id)
+    except ValueError:
+        raise BadRequest('Некорректный cursor')
+    if pub_date is None:
+        raise BadRequest('Некорректный cursor')
+    return pub_date, post_id
+
+
+def parse_params(request):
+    fields = request.GET.get('fields')
+    fields = fields.split(',') if fields else list(FIELDS)
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    limit = request.GET.get('limit', str(POSTS_PER_PAGE))
+    if not limit.isdigit() or not 0 < int(limit) <= MAX_LIMIT:
+        raise BadRequest(f'limit должен быть от 1 до {MAX_LIMIT}')
+    cursor = request.GET.get('cursor')
+    return {
+        'fields': fields,
+        'limit': int(limit),
+        'cursor': decode_cursor(cursor) if cursor else None,
+    }
+
+
+def after(queryset, cursor):
+    """Записи старше курсора (pub_date, id), от новых к старым."""
+    queryset = queryset.order_by('-pub_date', '-id')
+    if cursor is None:
+        return queryset
+    pub_date, pk = cursor
+    return queryset.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+    )
+
+
+class CursorPage:
+    """Страница объектов по курсору; запрос выполняется при первом
+    обращении, так что из закешированного шаблона его не будет вовсе."""
+
+    def __init__(self, queryset, limit, cursor=None):
+        self.queryset = queryset
+        self.limit = limit
+        self.cursor = cursor
+
+    @cached_property
+    def _rows(self):
+        return list(after(self.queryset, self.cursor)[:self.limit + 1])
+
+    @property
+    def object_list(self):
+        return self._rows[:self.limit]
+
+    @property
+    def next_cursor(self):
+        if len(self._rows) <= self.limit:
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(last.pub_date, last.id)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def page(queryset, fields, limit, cursor):
+    """Страница ленты по курсору (pub_date, id) — без OFFSET, так что
+    дальние страницы стоят столько же, сколько первая."""
+    queryset = after(queryset, cursor)
+    lookups = {FIELDS[field] for field in fields} | {'id', 'pub_date'}
+    rows = list(queryset.values(*lookups)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['pub_date'], rows[-1]['id'])
+    results = [{field: row[FIELDS[field]] for field in fields} for row in rows]
+    if 'image' in fields:
+        for result in results:
+            name = result['image']
+            result['image'] = default_storage.url(name) if name else None
+    return results, next_cursor
+
+
+def etag(request, tags, fields):
+    tags = list(tags) + [
+        FIELD_TAGS[field] for field in fields if field in FIELD_TAGS
+    ]
+    parts = [request.path, request.GET.urlencode()]
+    parts.extend(zip(tags, cache_tags.versions(*tags)))
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def error(message, status=HTTPStatus.BAD_REQUEST):
+    return JsonResponse({'error': message}, status=status)
+
+
+def login_required(view):
+    """Как django login_required, но вместо редиректа на форму входа
+    отвечает JSON-ошибкой 403."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error('Требуется авторизация', HTTPStatus.FORBIDDEN)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def feed_response(request, queryset, tags, private=False):
+    """JSON-лента с курсорной пагинацией и ответом 304, если версии тегов
+    ленты и параметры запроса не изменились."""
+    try:
+        params = parse_params(request)
+    except BadRequest as exc:
+        return error(str(exc))
+    feed_etag = etag(request, tags, params['fields'])
+    response = get_conditional_response(request, etag=feed_etag)
+    if response is None:
+        results, next_cursor = page(queryset, **params)
+        next_url = None
+        if next_cursor is not None:
+            query = request.GET.copy()
+            query['cursor'] = next_cursor
+            next_url = request.build_absolute_uri(
+                f'{request.path}?{query.urlencode()}'
+            )
+        response = JsonResponse(
+            {'results': results, 'next': next_url},
+            json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+        )
+    response['ETag'] = feed_etag
+    patch_cache_control(response, private=private, no_cache=True)
+    return response
@@ -1,3 +1,57 @@
+import os
+
 import django.conf
 
 POSTS_PER_PAGE = getattr(django.conf.settings, 'APP_YATUBE_POSTS_PER_PAGE', 10)
+COMMENTS_PER_PAGE = getattr(
+    django.conf.settings, 'APP_YATUBE_COMMENTS_PER_PAGE', 20
+)
+BENCHMARKS_DIR = getattr(
+    django.conf.settings, 'APP_YATUBE_BENCHMARKS_DIR',
+    os.path.join(django.conf.settings.BASE_DIR, 'var', 'benchmarks')
+)
+TOP_LIST_SIZE = getattr(django.conf.settings, 'APP_YATUBE_TOP_LIST_SIZE', 100)
+TOP_LIST_TIMEOUT = getattr(
+    django.conf.settings, 'APP_YATUBE_TOP_LIST_TIMEOUT', 60 * 60
+)
+FOLLOW_SET_TIMEOUT = getattr(
+    django.conf.settings, 'APP_YATUBE_FOLLOW_SET_TIMEOUT', 60 * 60 * 24
+)
+FOLLOW_GRAPH_DIR = getattr(
+    django.conf.settings, 'APP_YATUBE_FOLLOW_GRAPH_DIR',
+    os.path.join(django.conf.settings.BASE_DIR, 'var', 'follow_graph')
+)
+FOLLOW_GRAPH_MAX_DELTA = getattr(
+    django.conf.settings, 'APP_YATUBE_FOLLOW_GRAPH_MAX_DELTA', 1000
+)
+SUGGESTIONS_PER_USER = getattr(
+    django.conf.settings, 'APP_YATUBE_SUGGESTIONS_PER_USER', 20
+)
+SUGGESTIONS_SHOWN = getattr(
+    django.conf.settings, 'APP_YATUBE_SUGGESTIONS_SHOWN', 5
+)
+SUGGESTIONS_TIMEOUT = getattr(
+    django.conf.settings, 'APP_YATUBE_SUGGESTIONS_TIMEOUT', 60 * 60 * 24
+)
+TRENDING_BUCKET = getattr(
+    django.conf.settings, 'APP_YATUBE_TRENDING_BUCKET', 60 * 5
+)
+TRENDING_WINDOW = getattr(
+    django.conf.settings, 'APP_YATUBE_TRENDING_WINDOW', 60 * 60 * 24
+)
+TRENDING_HALF_LIFE = getattr(
+    django.conf.settings, 'APP_YATUBE_TRENDING_HALF_LIFE', 60 * 60 * 6
+)
+TRENDING_REFRESH = getattr(
+    django.conf.settings, 'APP_YATUBE_TRENDING_REFRESH', 60
+)
+TRENDING_SIZE = getattr(django.conf.settings, 'APP_YATUBE_TRENDING_SIZE', 100)
+TRENDING_GROUPS = getattr(
+    django.conf.settings, 'APP_YATUBE_TRENDING_GROUPS', 10
+)
+ENTITY_CACHE_TIMEOUT = getattr(
+    django.conf.settings, 'APP_YATUBE_ENTITY_CACHE_TIMEOUT', 60 * 60
+)
+ENTITY_NEGATIVE_TIMEOUT = getattr(
+    django.conf.settings, 'APP_YATUBE_ENTITY_NEGATIVE_TIMEOUT', 60
+)
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from core import loader
+
+        from . import signals  # noqa: F401
+        from .models import Comment, Post
+        loader.install(Post, 'author', 'group')
+        loader.install(Comment, 'author')
@@ -0,0 +1,252 @@
+import io
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from . import follow_graph, urls
+from .app_settings import BENCHMARKS_DIR
+from .models import Follow, Group, Post, User
+from .seeding import Seeder
+from .stats import reconcile
+
+PERCENTILES = (50, 95, 99)
+# Маршруты, которые пишут в базу, гоняются только от своего пользователя,
+# чтобы параллельные воркеры не мешали друг другу.
+OWN_ROUTES = ('post_edit', 'profile_follow', 'profile_unfollow')
+# SQLite пускает одного писателя за раз, а транзакция, прочитавшая
+# устаревший снимок, получает «database is locked» без ожидания. Пишущие
+# маршруты идут по одному, читающие — параллельно.
+_writer_lock = threading.Lock()
+
+
+def seed(users=50, groups=10, posts=1000, comments=3000, follows=300,
+         images=20):
+    seeder = Seeder(prefix='bench', rng=random.Random(0))
+    seeder.users(users)
+    seeder.groups(groups)
+    seeder.posts(posts, seeder.images(images), image_ratio=0.1)
+    seeder.comments(comments)
+    seeder.follows(follows)
+    reconcile()
+    follow_graph.rebuild()
+
+
+class Scenario:
+    """Набор адресов всех маршрутов posts/urls.py для одного воркера."""
+
+    def __init__(self, user, target):
+        self.user = user
+        group = Group.objects.filter(posts__isnull=False).first()
+        post = Post.objects.filter(comments__isnull=False).first()
+        own_post = post
+        if user is not None:
+            own_post = user.posts.first()
+            Follow.objects.filter(user=user, author=target).delete()
+        self.args = {
+            'group_list': [group.slug],
+            'api_group_list': [group.slug],
+            'profile': [target.username],
+            'api_profile': [target.username],
+            'post_detail': [post.id],
+            'post_comments': [post.id],
+            'post_edit': [own_post.id],
+            'add_comment': [post.id],
+            'profile_follow': [target.username],
+            'profile_unfollow': [target.username],
+        }
+        self.cookie = ''
+        if user is not None:
+            client = Client()
+            client.force_login(user)
+            session = client.cookies[settings.SESSION_COOKIE_NAME]
+            self.cookie = f'{settings.SESSION_COOKIE_NAME}={session.value}'
+
+    def routes(self):
+        for pattern in urls.urlpatterns:
+            name = pattern.name
+            if name in OWN_ROUTES and self.user is None:
+                continue
+            path = reverse(f'posts:{name}', args=self.args.get(name, []))
+            yield name, path
+
+
+def _environ(path, cookie):
+    path, _, query = path.partition('?')
+    return {
+        'HTTP_COOKIE': cookie,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'REMOTE_ADDR': '127.0.0.1',
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multiprocess': False,
+        'wsgi.multithread': True,
+        'wsgi.run_once': False,
+    }
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _call(application, path, cookie):
+    """Код ответа или None, если ответ оборвался исключением, в том числе
+    при отдаче тела."""
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line.split()[0]))
+
+    try:
+        body = application(_environ(path, cookie), start_response)
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+    except Exception:
+        return None
+    return status[0] if status else None
+
+
+def _request(application, name, path, cookie):
+    if name not in OWN_ROUTES:
+        return _call(application, path, cookie)
+    with _writer_lock:
+        return _call(application, path, cookie)
+
+
+def _worker(application, scenario, label, requests, samples):
+    counter = _QueryCounter()
+    routes = list(scenario.routes())
+    for name, path in routes:
+        _request(application, name, path, scenario.cookie)
+    with connection.execute_wrapper(counter):
+        for index in range(requests):
+            name, path = routes[index % len(routes)]
+            counter.count = 0
+            started = time.perf_counter()
+            status = _request(application, name, path, scenario.cookie)
+            duration = time.perf_counter() - started
+            samples[(name, label)].append((duration, counter.count, status))
+
+
+def run(requests=200, concurrency=4, anonymous=True, authenticated=True):
+    application = get_wsgi_application()
+    users = list(User.objects.filter(
+        username__startswith='bench_', posts__isnull=False
+    ).distinct()[:concurrency + 1])
+    target, users = users[0], users[1:]
+    scenarios = []
+    if anonymous:
+        scenarios += [(Scenario(None, target), 'anonymous')] * concurrency
+    if authenticated:
+        scenarios += [
+            (Scenario(user, target), 'authenticated') for user in users
+        ]
+    samples = defaultdict(list)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(scenarios)) as executor:
+        futures = [
+            executor.submit(
+                _worker, application, scenario, label, requests, samples
+            )
+            for scenario, label in scenarios
+        ]
+        for future in futures:
+            future.result()
+    result = summarize(samples, time.perf_counter() - started)
+    result['concurrency'] = concurrency
+    return result
+
+
+def _percentile(values, percent):
+    index = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[index]
+
+
+def _failed(status):
+    return status is None or status >= 500
+
+
+def _stats(rows, elapsed):
+    durations = sorted(duration for duration, _, _ in rows)
+    stats = {
+        'requests': len(rows),
+        'errors': sum(1 for _, _, status in rows if _failed(status)),
+        'throughput': len(rows) / elapsed,
+        'queries': sum(queries for _, queries, _ in rows) / len(rows),
+    }
+    for percent in PERCENTILES:
+        stats[f'p{percent}'] = _percentile(durations, percent) * 1000
+    return stats
+
+
+def summarize(samples, elapsed):
+    routes = {
+        f'{label} {name}': _stats(rows, elapsed)
+        for (name, label), rows in sorted(samples.items())
+    }
+    everything = [row for rows in samples.values() for row in rows]
+    return {
+        'created': time.time(),
+        'total': _stats(everything, elapsed),
+        'routes': routes,
+    }
+
+
+def baseline_path(name):
+    return os.path.join(BENCHMARKS_DIR, f'{name}.json')
+
+
+def save_baseline(name, result):
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def load_baseline(name):
+    with open(baseline_path(name)) as f:
+        return json.load(f)
+
+
+def compare(result, baseline, tolerance):
+    """Маршруты, где задержка или число запросов выросли сверх допуска."""
+    regressions = []
+    for route, stats in result['routes'].items():
+        before = baseline['routes'].get(route)
+        if before is None:
+            continue
+        for metric in ('p50', 'p95', 'queries'):
+            if before[metric] and (
+                stats[metric] > before[metric] * (1 + tolerance / 100)
+            ):
+                regressions.append((route, metric, before[metric],
+                                    stats[metric]))
+    return regressions
@@ -0,0 +1,103 @@
+"""Кеш пользователей по username, сообществ по slug и авторов постов.
+
+Сквозное чтение: объект берётся из кеша, а при промахе читается из базы
+и кладётся в кеш; отсутствие тоже кешируется, на ENTITY_NEGATIVE_TIMEOUT.
+Сигналы сбрасывают записи при сохранении и удалении. Вместе с объектом
+хранится его username (slug) по pk, чтобы после переименования сбросить
+и запись под старым именем. Запись в кеш откладывается до фиксации
+транзакции, как в follow_sets. Пользователи хранятся только с полями,
+нужными страницам: хеш пароля в общий кеш не попадает.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from .app_settings import ENTITY_CACHE_TIMEOUT, ENTITY_NEGATIVE_TIMEOUT
+from .models import Group, Post, User
+
+MISSING = 'missing'
+LOOKUPS = {User: 'username', Group: 'slug'}
+FIELDS = {User: ('id', 'username', 'first_name', 'last_name')}
+
+
+def _key(model, value):
+    digest = hashlib.md5(value.encode()).hexdigest()
+    return f'entity:{model._meta.label_lower}:{digest}'
+
+
+def _pk_key(model, pk):
+    return f'entity:{model._meta.label_lower}:pk:{pk}'
+
+
+def get(model, value):
+    """Объект по username или slug; Http404, если его нет."""
+    key = _key(model, value)
+    cached = cache.get(key)
+    if isinstance(cached, str):
+        raise Http404
+    if cached is not None:
+        return cached
+    queryset = model._default_manager.filter(**{LOOKUPS[model]: value})
+    if model in FIELDS:
+        queryset = queryset.only(*FIELDS[model])
+    obj = queryset.first()
+    if obj is None:
+        transaction.on_commit(
+            lambda: cache.set(key, MISSING, ENTITY_NEGATIVE_TIMEOUT)
+        )
+        raise Http404
+    transaction.on_commit(lambda: cache.set_many({
+        key: obj, _pk_key(model, obj.pk): value,
+    }, ENTITY_CACHE_TIMEOUT))
+    return obj
+
+
+def user(username):
+    return get(User, username)
+
+
+def group(slug):
+    return get(Group, slug)
+
+
+def _author_key(post_id):
+    return f'entity:post_author:{post_id}'
+
+
+def post_author(post_id):
+    """id автора поста; Http404, если поста нет. Автор поста не
+    меняется, так что запись сбрасывает только удаление поста. Отсутствие
+    не кешируется: id следующего поста известен заранее."""
+    key = _author_key(post_id)
+    author_id = cache.get(key)
+    if author_id is not None:
+        return author_id
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        raise Http404
+    transaction.on_commit(
+        lambda: cache.set(key, author_id, ENTITY_CACHE_TIMEOUT)
+    )
+    return author_id
+
+
+def forget_post(post_id):
+    key = _author_key(post_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate(instance):
+    model = type(instance)
+    pk_key = _pk_key(model, instance.pk)
+    keys = [_key(model, getattr(instance, LOOKUPS[model])), pk_key]
+    previous = cache.get(pk_key)
+    if previous is not None:
+        keys.append(_key(model, previous))
+    cache.delete_many(keys)
+    # Чтение, начатое до фиксации, могло успеть положить старую копию.
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,227 @@
+import hashlib
+import io
+import json
+import re
+import zipfile
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import quote_etag
+
+from .models import Comment, Follow, Post
+
+CHUNK_SIZE = 500
+FILE_CHUNK_SIZE = 64 * 1024
+# Фиксированная дата записей делает архив побайтно повторяемым,
+# без этого нельзя докачивать его по Range.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+RANGE = re.compile(r'^bytes=(\d+)-(\d*)$')
+# Длина выгрузки хранится по её ETag, то есть по содержимому, и
+# устареть не может.
+LENGTH_TIMEOUT = 60 * 60 * 24
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'zip': 'application/zip',
+}
+
+
+def _line(record):
+    return (json.dumps(record, ensure_ascii=False) + '\n').encode()
+
+
+def records(user):
+    yield {
+        'type': 'user',
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+        'date_joined': user.date_joined.isoformat(),
+    }
+    posts = (
+        Post.objects.filter(author=user).order_by('id')
+        .values_list('id', 'text', 'group__slug', 'pub_date', 'image')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for post_id, text, group, pub_date, image in posts:
+        yield {
+            'type': 'post',
+            'id': post_id,
+            'text': text,
+            'group': group,
+            'pub_date': pub_date.isoformat(),
+            'image': image or None,
+        }
+    comments = (
+        Comment.objects.filter(author=user).order_by('id')
+        .values_list('id', 'post_id', 'text', 'pub_date')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for comment_id, post_id, text, pub_date in comments:
+        yield {
+            'type': 'comment',
+            'id': comment_id,
+            'post': post_id,
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+        }
+    follows = (
+        Follow.objects.filter(user=user).order_by('id')
+        .values_list('author__username', flat=True)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for author in follows:
+        yield {'type': 'follow', 'author': author}
+
+
+def ndjson_stream(user):
+    for record in records(user):
+        yield _line(record)
+
+
+class _Sink(io.RawIOBase):
+    """Поток без seek для ZipFile: записанное забирается порциями."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _entry(name, compress_type):
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    info.compress_type = compress_type
+    return info
+
+
+def _image_names(user):
+    return (
+        Post.objects.filter(author=user).exclude(image='')
+        .exclude(image=None).order_by('image')
+        .values_list('image', flat=True).distinct()
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def zip_stream(user):
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        entry = _entry('data.ndjson', zipfile.ZIP_DEFLATED)
+        with archive.open(entry, 'w') as data:
+            for record in records(user):
+                data.write(_line(record))
+                yield sink.drain()
+        for name in _image_names(user):
+            try:
+                source = default_storage.open(name)
+            except FileNotFoundError:
+                continue
+            entry = _entry(f'images/{name}', zipfile.ZIP_STORED)
+            with source, archive.open(entry, 'w') as target:
+                for block in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+                    target.write(block)
+                    yield sink.drain()
+    yield sink.drain()
+
+
+def _non_empty(stream):
+    return (chunk for chunk in stream if chunk)
+
+
+def fingerprint(user, export_format):
+    """Сильный валидатор выгрузки: дайджест всех её записей, в том числе
+    имён картинок, а для zip — ещё и размеров их файлов. Обходит те же
+    строки, что и выгрузка, но без сериализации архива."""
+    digest = hashlib.md5(export_format.encode())
+    for record in records(user):
+        digest.update(_line(record))
+    if export_format == 'zip':
+        for name in _image_names(user):
+            try:
+                size = default_storage.size(name)
+            except OSError:
+                size = None
+            digest.update(f'{name}:{size}\n'.encode())
+    return digest.hexdigest()
+
+
+def byte_range(stream, start, end):
+    """Часть потока с байта start по end включительно."""
+    position = 0
+    for chunk in stream:
+        chunk_end = position + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(0, start - position):end + 1 - position]
+        position = chunk_end
+        if position > end:
+            return
+
+
+def _length_key(etag):
+    return f'export_length:{etag}'
+
+
+def _counted(stream, key):
+    """Поток как есть; отданный до конца запоминает свою длину."""
+    length = 0
+    for chunk in stream:
+        length += len(chunk)
+        yield chunk
+    cache.set(key, length, LENGTH_TIMEOUT)
+
+
+def _length(stream, key):
+    length = cache.get(key)
+    if length is None:
+        length = sum(len(chunk) for chunk in stream())
+        cache.set(key, length, LENGTH_TIMEOUT)
+    return length
+
+
+def download_response(request, stream, etag, content_type, filename):
+    """Потоковая отдача с поддержкой Range/If-Range для докачки.
+
+    Длина потока заранее неизвестна. Её запоминает по ETag полная
+    отдача, а если её не было, поток для Range-запроса один раз
+    прогоняется вхолостую. Некорректный Range игнорируется.
+    """
+    key = _length_key(etag)
+    etag = quote_etag(etag)
+    match = RANGE.match(request.META.get('HTTP_RANGE', ''))
+    if match and match[2] and int(match[2]) < int(match[1]):
+        match = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if match and if_range in (None, etag):
+        length = _length(stream, key)
+        start = int(match[1])
+        end = min(int(match[2]), length - 1) if match[2] else length - 1
+        if start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{length}'
+            return response
+        response = StreamingHttpResponse(
+            byte_range(_non_empty(stream()), start, end),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{length}'
+        response['Content-Length'] = end - start + 1
+    else:
+        response = StreamingHttpResponse(
+            _counted(_non_empty(stream()), key), content_type=content_type
+        )
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
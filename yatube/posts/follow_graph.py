@@ -0,0 +1,388 @@
+"""Граф подписок в памяти процесса.
+
+Подписки лежат в двух CSR-массивах: для каждого id пользователя в
+offsets хранится начало его отрезка в targets, отрезки отсортированы.
+Прямой граф — на кого подписан пользователь, обратный — кто подписан на
+автора. Граф строится потоковым чтением Follow и сохраняется снимком на
+диск, а воркеры открывают снимок через mmap: без разбора и без своей
+копии в памяти. Подписки после снимка копятся в общем кеше дельтой
+добавленных и удалённых пар, её пишут сигналы Follow.
+
+Запросы граф никогда не строят: собирает и публикует снимок только
+команда snapshot_follow_graph, которую запускают по расписанию (с
+--if-needed она работает, лишь когда дельта разрослась или пропала).
+До того запросы отвечают последним снимком — с дельтой, если она есть,
+и пустым графом, если снимка ещё нет.
+"""
+import bisect
+import glob
+import mmap
+import os
+import struct
+import time
+from array import array
+from itertools import accumulate
+
+from core import cache_tags, memory
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from .app_settings import FOLLOW_GRAPH_DIR, FOLLOW_GRAPH_MAX_DELTA
+from .models import Follow, User
+
+# Тег страниц, где видны подписки по графу: сдвигается, когда граф
+# меняется не подпиской, а публикацией снимка или сбросом дельты.
+TAG = 'follow_graph'
+DELTA_KEY = 'follow_graph:delta'
+DELTA_LOCK_KEY = 'follow_graph:delta:lock'
+REBUILD_LOCK_KEY = 'follow_graph:rebuild'
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 50
+REBUILD_LOCK_TIMEOUT = 5 * 60
+CHUNK_SIZE = 5000
+MAGIC = b'YTFGRAPH'
+# Заголовок в 32 байта: массивы за ним выровнены по 8.
+HEADER = struct.Struct('=8sQQQ')
+ITEM_SIZE = array('q').itemsize
+
+_graph = None
+
+
+def _zeros(size):
+    return array('q', bytes(ITEM_SIZE * size))
+
+
+def _offsets(counts):
+    return array('q', accumulate(counts, initial=0))
+
+
+class CSR:
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    def _bounds(self, node):
+        if not 0 <= node < len(self.offsets) - 1:
+            return 0, 0
+        return self.offsets[node], self.offsets[node + 1]
+
+    def neighbors(self, node):
+        start, end = self._bounds(node)
+        return self.targets[start:end]
+
+    def degree(self, node):
+        start, end = self._bounds(node)
+        return end - start
+
+    def has_edge(self, node, target):
+        start, end = self._bounds(node)
+        index = bisect.bisect_left(self.targets, target, start, end)
+        return index < end and self.targets[index] == target
+
+
+class Graph:
+    def __init__(self, version, following, followers):
+        self.version = version
+        self.following = following
+        self.followers = followers
+
+    @property
+    def nodes(self):
+        return len(self.following.offsets) - 1
+
+    @property
+    def edges(self):
+        return len(self.following.targets)
+
+    @classmethod
+    def build(cls, version, nodes, rows):
+        """rows — пары (user_id, author_id), упорядоченные по обоим полям.
+
+        Обратный граф собирается сортировкой подсчётом из прямого, так что
+        отрезки подписчиков тоже выходят отсортированными.
+        """
+        following_counts = _zeros(nodes)
+        followers_counts = _zeros(nodes)
+        targets = array('q')
+        for user_id, author_id in rows:
+            following_counts[user_id] += 1
+            followers_counts[author_id] += 1
+            targets.append(author_id)
+        following = CSR(_offsets(following_counts), targets)
+        followers_offsets = _offsets(followers_counts)
+        positions = array('q', followers_offsets[:-1])
+        followers_targets = _zeros(len(targets))
+        for user_id in range(nodes):
+            for author_id in following.neighbors(user_id):
+                followers_targets[positions[author_id]] = user_id
+                positions[author_id] += 1
+        return cls(
+            version, following, CSR(followers_offsets, followers_targets)
+        )
+
+    def parts(self):
+        return (
+            self.following.offsets, self.following.targets,
+            self.followers.offsets, self.followers.targets,
+        )
+
+    def save(self, path):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.version, self.nodes, self.edges))
+            for part in self.parts():
+                f.write(part)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, nodes, edges = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f'{path}: это не снимок графа подписок')
+        items = memoryview(data)[HEADER.size:].cast('q')
+        bounds = list(accumulate(
+            (nodes + 1, edges, nodes + 1, edges), initial=0
+        ))
+        parts = [items[start:end] for start, end in zip(bounds, bounds[1:])]
+        return cls(version, CSR(*parts[:2]), CSR(*parts[2:]))
+
+
+class FollowGraph:
+    """Снимок графа с наложенной дельтой — то, с чем работают views."""
+
+    def __init__(self, graph, added=frozenset(), removed=frozenset()):
+        self.graph = graph
+        self.added = added
+        self.removed = removed
+
+    def _adjacent(self, csr, side, node):
+        result = set(csr.neighbors(node))
+        if self.added or self.removed:
+            other = 1 - side
+            result.update(
+                pair[other] for pair in self.added if pair[side] == node
+            )
+            result.difference_update(
+                pair[other] for pair in self.removed if pair[side] == node
+            )
+        return result
+
+    def following(self, user_id):
+        return self._adjacent(self.graph.following, 0, user_id)
+
+    def followers(self, author_id):
+        return self._adjacent(self.graph.followers, 1, author_id)
+
+    def follows(self, user_id, author_id):
+        pair = (user_id, author_id)
+        if pair in self.added:
+            return True
+        if pair in self.removed:
+            return False
+        return self.graph.following.has_edge(user_id, author_id)
+
+    def _touched(self, side, node):
+        return any(
+            pair[side] == node for pairs in (self.added, self.removed)
+            for pair in pairs
+        )
+
+    def following_count(self, user_id):
+        if self._touched(0, user_id):
+            return len(self.following(user_id))
+        return self.graph.following.degree(user_id)
+
+    def followers_count(self, author_id):
+        if self._touched(1, author_id):
+            return len(self.followers(author_id))
+        return self.graph.followers.degree(author_id)
+
+    def mutual(self, user_id):
+        """Взаимные подписки пользователя."""
+        return self.following(user_id) & self.followers(user_id)
+
+    def known_followers(self, viewer_id, author_id):
+        """Подписчики автора среди тех, на кого подписан зритель."""
+        return self.following(viewer_id) & self.followers(author_id)
+
+    def common_following(self, user_id, other_id):
+        return self.following(user_id) & self.following(other_id)
+
+
+def snapshot_path(version):
+    return os.path.join(FOLLOW_GRAPH_DIR, f'follow_graph-{version}.bin')
+
+
+def _remove_old_snapshots(version):
+    current = snapshot_path(version)
+    for path in glob.glob(os.path.join(FOLLOW_GRAPH_DIR, '*.bin')):
+        if path != current:
+            os.remove(path)
+
+
+def from_database(version=0):
+    nodes = (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    # Подписки новых пользователей, появившихся во время чтения, уже
+    # попадут в дельту.
+    rows = (
+        Follow.objects.filter(user_id__lt=nodes, author_id__lt=nodes)
+        .order_by('user_id', 'author_id')
+        .values_list('user_id', 'author_id')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    return Graph.build(version, nodes, rows)
+
+
+def _empty_changes():
+    return {'added': set(), 'removed': set()}
+
+
+def _mark(delta):
+    """Начало сборки: подписки с этого момента копятся ещё и в next и
+    перейдут в дельту нового снимка. Всё, что было в дельте раньше, уже
+    зафиксировано в базе и попадёт в снимок."""
+    if delta is None:
+        delta = {'base': None, **_empty_changes()}
+    delta['next'] = _empty_changes()
+    return delta
+
+
+def rebuild():
+    """Строит граф из базы и публикует снимок для всех воркеров. Если
+    пересборка уже идёт в другом процессе, возвращает None.
+
+    Снимок сначала пишется и открывается, и только потом под блокировкой
+    дельты на него переключается дельта: воркер, увидевший новую базу,
+    всегда найдёт её файл.
+    """
+    global _graph
+    if not cache.add(REBUILD_LOCK_KEY, True, REBUILD_LOCK_TIMEOUT):
+        return None
+    version = time.time_ns()
+    try:
+        _with_delta(_mark)
+        os.makedirs(FOLLOW_GRAPH_DIR, exist_ok=True)
+        from_database(version).save(snapshot_path(version))
+        graph = Graph.open(snapshot_path(version))
+
+        def swap(delta):
+            # Без next нельзя знать, что поменялось за время сборки:
+            # дельту лучше сбросить, и граф пересоберут ещё раз.
+            if delta is None or 'next' not in delta:
+                return None
+            return {'base': version, **delta['next']}
+
+        if not _with_delta(swap):
+            invalidate()
+        _graph = graph
+        _remove_old_snapshots(version)
+        cache_tags.touch(TAG)
+    finally:
+        cache.delete(REBUILD_LOCK_KEY)
+    return graph
+
+
+def _latest_snapshot():
+    paths = glob.glob(os.path.join(FOLLOW_GRAPH_DIR, 'follow_graph-*.bin'))
+    for path in sorted(paths, key=os.path.getmtime, reverse=True):
+        try:
+            return Graph.open(path)
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def _oversized(delta):
+    return len(delta['added']) + len(delta['removed']) > FOLLOW_GRAPH_MAX_DELTA
+
+
+def needs_rebuild():
+    delta = cache.get(DELTA_KEY)
+    return (
+        delta is None or _oversized(delta)
+        or not os.path.exists(snapshot_path(delta['base']))
+    )
+
+
+def current():
+    """Граф для запроса: последний снимок с дельтой поверх. Без дельты,
+    которая к нему относится, — снимок как есть; без снимка — пустой
+    граф."""
+    global _graph
+    delta = cache.get(DELTA_KEY)
+    graph = _graph
+    if delta is not None and (graph is None or graph.version != delta['base']):
+        try:
+            graph = _graph = Graph.open(snapshot_path(delta['base']))
+        except FileNotFoundError:
+            pass
+    if graph is None:
+        graph = _graph = _latest_snapshot()
+    if graph is None:
+        return FollowGraph(Graph.build(0, 0, ()))
+    if delta is None or graph.version != delta['base']:
+        return FollowGraph(graph)
+    return FollowGraph(graph, delta['added'], delta['removed'])
+
+
+def _with_delta(change):
+    """Заменяет дельту результатом change(delta) под блокировкой; None
+    удаляет её. Возвращает False, если блокировку взять не удалось."""
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(DELTA_LOCK_KEY, True, LOCK_TIMEOUT):
+            break
+        time.sleep(0.01)
+    else:
+        return False
+    try:
+        delta = change(cache.get(DELTA_KEY))
+        if delta is None:
+            cache.delete(DELTA_KEY)
+        else:
+            cache.set(DELTA_KEY, delta, None)
+    finally:
+        cache.delete(DELTA_LOCK_KEY)
+    return True
+
+
+def _update(pair, follows):
+    def change(delta):
+        if delta is None:
+            return None
+        for changes in (delta, delta.get('next')):
+            if changes is not None:
+                changes['removed' if follows else 'added'].discard(pair)
+                changes['added' if follows else 'removed'].add(pair)
+        return delta
+
+    if not _with_delta(change):
+        invalidate()
+
+
+def followed(user_id, author_id):
+    transaction.on_commit(lambda: _update((user_id, author_id), True))
+
+
+def unfollowed(user_id, author_id):
+    transaction.on_commit(lambda: _update((user_id, author_id), False))
+
+
+def invalidate():
+    """Сбрасывает дельту, чтобы граф пересобрали при ближайшем запуске
+    snapshot_follow_graph; нужно после массовых вставок, которые не шлют
+    сигналов."""
+    cache.delete(DELTA_KEY)
+    cache_tags.touch(TAG)
+
+
+def _size():
+    graph = _graph
+    if graph is None:
+        return 0, 0
+    return graph.edges, sum(part.nbytes for part in graph.parts())
+
+
+memory.register_cache('follow_graph', _size)
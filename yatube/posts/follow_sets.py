@@ -0,0 +1,107 @@
+"""Множества авторов, на которых подписан пользователь, в кеше.
+
+Для каждого пользователя хранится отсортированный массив id авторов:
+проверка подписки — двоичный поиск, лента подписок — готовый список id.
+Сигналы Follow правят массивы на месте. Кеш пишется только после
+фиксации транзакции, чтобы откат не оставил в нём несуществующих
+подписок. Как и в top_lists, каждая подписка меняет версию множества, и
+собранный при промахе массив не кладётся, если версия успела смениться.
+"""
+import bisect
+import time
+from array import array
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .app_settings import FOLLOW_SET_TIMEOUT
+from .models import Follow
+
+LOCK_TIMEOUT = 5
+
+
+def _key(user_id):
+    return f'follow_set:{user_id}'
+
+
+def _version_key(user_id):
+    return f'follow_set:{user_id}:version'
+
+
+def load(user_id):
+    found = cache.get_many([_key(user_id), _version_key(user_id)])
+    authors = found.get(_key(user_id))
+    if authors is None:
+        version = found.get(_version_key(user_id))
+        authors = array('q', sorted(
+            Follow.objects.filter(user_id=user_id)
+            .values_list('author_id', flat=True)
+        ))
+        transaction.on_commit(lambda: _store(user_id, authors, version))
+    return authors
+
+
+def _store(user_id, authors, version):
+    key = _key(user_id)
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, True, LOCK_TIMEOUT):
+        return
+    try:
+        if cache.get(_version_key(user_id)) == version:
+            cache.add(key, authors, FOLLOW_SET_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def contains(authors, author_id):
+    index = bisect.bisect_left(authors, author_id)
+    return index < len(authors) and authors[index] == author_id
+
+
+def is_following(user_id, author_id):
+    return contains(load(user_id), author_id)
+
+
+def _update(user_id, change):
+    """Правит массив, если он уже в кеше; см. top_lists._update."""
+    key = _key(user_id)
+    lock_key = f'{key}:lock'
+    cache.set(_version_key(user_id), time.time_ns(), FOLLOW_SET_TIMEOUT)
+    if not cache.add(lock_key, True, LOCK_TIMEOUT):
+        cache.delete(key)
+        return
+    try:
+        authors = cache.get(key)
+        if authors is not None:
+            change(authors)
+            cache.set(key, authors, FOLLOW_SET_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def add(user_id, author_id):
+    def change(authors):
+        if not contains(authors, author_id):
+            authors.insert(bisect.bisect_left(authors, author_id), author_id)
+
+    transaction.on_commit(lambda: _update(user_id, change))
+
+
+def remove(user_id, author_id):
+    def change(authors):
+        if contains(authors, author_id):
+            authors.remove(author_id)
+
+    transaction.on_commit(lambda: _update(user_id, change))
+
+
+def invalidate(user_ids):
+    """Сбрасывает множества пользователей; нужно после массовых вставок
+    подписок, которые не шлют сигналов."""
+    user_ids = set(user_ids)
+    version = time.time_ns()
+    cache.set_many(
+        {_version_key(user_id): version for user_id in user_ids},
+        FOLLOW_SET_TIMEOUT,
+    )
+    cache.delete_many([_key(user_id) for user_id in user_ids])
@@ -0,0 +1,89 @@
+import gzip
+import io
+import json
+import os
+import sys
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def is_gzip(path):
+    if path == '-':
+        return False
+    if path.endswith('.gz'):
+        return True
+    try:
+        with open(path, 'rb') as f:
+            return f.read(2) == GZIP_MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def open_lines(path):
+    """Построчное чтение JSONL, в том числе сжатого gzip."""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    if is_gzip(path):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+class ChunkWriter:
+    """Дописывает файл порциями. В режиме gzip каждая порция — отдельный
+    член архива, поэтому файл можно обрезать по границе любой порции
+    и продолжить запись, а gzip прочитает его целиком."""
+
+    def __init__(self, path, compress, offset=None):
+        self.compress = compress
+        if path == '-':
+            self.file = sys.stdout.buffer
+            return
+        self.file = open(path, 'ab')
+        if offset is not None:
+            self.file.truncate(offset)
+            self.file.seek(offset)
+
+    def write(self, records):
+        data = ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records
+        ).encode()
+        if self.compress:
+            data = gzip.compress(data)
+        self.file.write(data)
+        self.file.flush()
+        return self.tell()
+
+    def tell(self):
+        try:
+            return self.file.tell()
+        except (OSError, ValueError):
+            return None
+
+    def close(self):
+        if self.file is not sys.stdout.buffer:
+            self.file.close()
+
+
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, **state):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
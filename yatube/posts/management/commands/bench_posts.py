@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон всех страниц posts на отдельной тестовой базе: '
+        'пропускная способность, p50/p95/p99 и SQL-запросы на страницу'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на каждый поток'
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Множитель размера тестовых данных'
+        )
+        parser.add_argument('--no-anonymous', action='store_true')
+        parser.add_argument('--no-authenticated', action='store_true')
+        parser.add_argument('--save', metavar='NAME',
+                            help='Сохранить результат как базовый')
+        parser.add_argument('--compare', metavar='NAME',
+                            help='Сравнить с сохранённым результатом')
+        parser.add_argument(
+            '--tolerance', type=float, default=10.0,
+            help='Допустимый рост метрик в процентах'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = benchmark.load_baseline(options['compare'])
+            except FileNotFoundError:
+                raise CommandError('Базовый результат не найден')
+        result = self.run_benchmark(options)
+        self.print_result(result)
+        if options['save']:
+            path = benchmark.save_baseline(options['save'], result)
+            self.stdout.write(f'Результат сохранён в {path}')
+        if baseline is not None:
+            self.check_regressions(result, baseline, options['tolerance'])
+
+    def create_database(self, directory):
+        """Тестовая база SQLite по умолчанию живёт в памяти с общим кешем,
+        где параллельные потоки ловят «table is locked». Прогон идёт на
+        файле в режиме WAL: читатели не ждут писателя, а писатели ждут
+        друг друга до timeout."""
+        settings_dict = connection.settings_dict
+        if connection.vendor == 'sqlite':
+            settings_dict['TEST']['NAME'] = os.path.join(
+                directory, 'bench.sqlite3'
+            )
+            settings_dict['OPTIONS'] = {
+                **settings_dict['OPTIONS'], 'timeout': 30,
+            }
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=WAL')
+
+    def run_benchmark(self, options):
+        scale = options['scale']
+        media_root = tempfile.mkdtemp()
+        database_dir = tempfile.mkdtemp()
+        old_name = connection.settings_dict['NAME']
+        self.create_database(database_dir)
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                benchmark.seed(
+                    users=int(50 * scale),
+                    groups=int(10 * scale) or 1,
+                    posts=int(1000 * scale),
+                    comments=int(3000 * scale),
+                    follows=int(300 * scale),
+                    images=int(20 * scale),
+                )
+                return benchmark.run(
+                    requests=options['requests'],
+                    concurrency=options['concurrency'],
+                    anonymous=not options['no_anonymous'],
+                    authenticated=not options['no_authenticated'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+            shutil.rmtree(database_dir, ignore_errors=True)
+
+    def print_result(self, result):
+        header = (f'{"маршрут":<36}{"запр.":>7}{"ошиб.":>7}{"rps":>9}'
+                  f'{"p50":>9}{"p95":>9}{"p99":>9}{"SQL":>7}')
+        self.stdout.write(self.style.MIGRATE_HEADING(header))
+        rows = list(result['routes'].items()) + [('ИТОГО', result['total'])]
+        for route, stats in rows:
+            self.stdout.write(
+                f'{route:<36}{stats["requests"]:>7}{stats["errors"]:>7}'
+                f'{stats["throughput"]:>9.1f}{stats["p50"]:>9.2f}'
+                f'{stats["p95"]:>9.2f}{stats["p99"]:>9.2f}'
+                f'{stats["queries"]:>7.1f}'
+            )
+
+    def check_regressions(self, result, baseline, tolerance):
+        regressions = benchmark.compare(result, baseline, tolerance)
+        for route, metric, before, after in regressions:
+            self.stdout.write(self.style.ERROR(
+                f'{route}: {metric} {before:.2f} -> {after:.2f}'
+            ))
+        if regressions:
+            raise CommandError('Найдены регрессии производительности')
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «кого почитать» по графу подписок; '
+        'запускается по расписанию'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=suggestions.CHUNK_SIZE,
+            help='Сколько пользователей пересчитывать в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = suggestions.compute_all(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано рекомендаций: {written} '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
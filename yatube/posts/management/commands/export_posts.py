@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.jsonl import Checkpoint, ChunkWriter
+from posts.models import Post
+from posts.seeding import chunked
+
+FIELDS = ('id', 'author__username', 'group__slug', 'text', 'pub_date',
+          'image')
+
+
+def to_record(row):
+    post_id, author, group, text, pub_date, image = row
+    return {
+        'id': post_id,
+        'author': author,
+        'group': group,
+        'text': text,
+        'pub_date': pub_date.isoformat(),
+        'image': image or None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты в JSONL (при необходимости в gzip) '
+        'с возможностью продолжить прерванную выгрузку'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Файл или "-" для stdout')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с последней контрольной точки'
+        )
+        parser.add_argument('--checkpoint', help='Файл контрольной точки')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        checkpoint = None
+        if output != '-':
+            checkpoint = Checkpoint(
+                options['checkpoint'] or f'{output}.checkpoint'
+            )
+        elif options['resume']:
+            raise CommandError('Продолжить выгрузку в stdout нельзя')
+        state = {'last_id': 0, 'offset': 0, 'exported': 0}
+        if options['resume']:
+            state = checkpoint.load() or state
+        writer = ChunkWriter(output, compress, offset=state['offset'])
+        rows = (
+            Post.objects.filter(id__gt=state['last_id'])
+            .order_by('id')
+            .values_list(*FIELDS)
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        try:
+            for chunk in chunked(rows, options['chunk_size']):
+                offset = writer.write(to_record(row) for row in chunk)
+                state = {
+                    'last_id': chunk[-1][0],
+                    'offset': offset,
+                    'exported': state['exported'] + len(chunk),
+                }
+                if checkpoint is not None:
+                    checkpoint.save(**state)
+        finally:
+            writer.close()
+        if checkpoint is not None:
+            checkpoint.clear()
+        self.stderr.write(f'Выгружено постов: {state["exported"]}')
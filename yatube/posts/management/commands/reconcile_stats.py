@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики пользователей и сообществ с исходными таблицами '
+        'и исправляет расхождения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=stats.CHUNK_SIZE,
+            help='Сколько строк сверять за один проход'
+        )
+
+    def handle(self, *args, **options):
+        fixed = stats.reconcile(chunk_size=options['chunk_size'])
+        for model, count in fixed.items():
+            self.stdout.write(f'{model}: исправлено строк {count}')
@@ -0,0 +1,58 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from posts import stats
+from posts.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро наполняет базу синтетическими пользователями, группами, '
+        'постами, комментариями и подписками'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument('--follows', type=int, default=50000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За какой период распределить даты публикаций'
+        )
+        parser.add_argument(
+            '--image-pool', type=int, default=0,
+            help='Сколько разных картинок сгенерировать'
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.1,
+            help='Доля постов с картинкой'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument(
+            '--seed', type=int, help='Зерно генератора для повторяемости'
+        )
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            prefix=options['prefix'],
+            chunk_size=options['chunk_size'],
+            days=options['days'],
+            rng=random.Random(options['seed']),
+        )
+        seeder.users(options['users'])
+        seeder.groups(options['groups'])
+        image_names = seeder.images(options['image_pool'])
+        seeder.posts(options['posts'], image_names, options['image_ratio'])
+        seeder.comments(options['comments'])
+        seeder.follows(options['follows'])
+        stats.reconcile()
+        for model, (inserted, elapsed) in seeder.rates.items():
+            rate = inserted / elapsed if elapsed else 0
+            self.stdout.write(
+                f'{model:<8} {inserted:>10} строк за {elapsed:7.2f} с '
+                f'({rate:,.0f} строк/с)'
+            )
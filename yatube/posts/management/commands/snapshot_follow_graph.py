@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import follow_graph
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает граф подписок из базы и сохраняет снимок, '
+        'который воркеры открывают через mmap'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-needed', action='store_true',
+            help='Только если дельта разрослась, пропала или снимка нет'
+        )
+
+    def handle(self, *args, **options):
+        if options['if_needed'] and not follow_graph.needs_rebuild():
+            self.stdout.write('Снимок актуален')
+            return
+        graph = follow_graph.rebuild()
+        if graph is None:
+            raise CommandError('Граф уже пересобирается')
+        self.stdout.write(self.style.SUCCESS(
+            f'Снимок {follow_graph.snapshot_path(graph.version)}: '
+            f'{graph.nodes} узлов, {graph.edges} подписок'
+        ))
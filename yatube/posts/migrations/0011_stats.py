@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-19 08:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0010_suggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Сообщество')),
+                ('posts', models.IntegerField(default=0, verbose_name='Постов')),
+                ('last_activity', models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts', models.IntegerField(default=0, verbose_name='Постов')),
+                ('comments', models.IntegerField(default=0, verbose_name='Комментариев')),
+                ('followers', models.IntegerField(default=0, verbose_name='Подписчиков')),
+                ('following', models.IntegerField(default=0, verbose_name='Подписок')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-19 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Источник')),
+                ('lines', models.PositiveIntegerField(default=0, verbose_name='Прочитано строк')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='Загружено')),
+                ('skipped', models.PositiveIntegerField(default=0, verbose_name='Пропущено')),
+            ],
+        ),
+    ]
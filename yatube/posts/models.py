@@ -96,3 +96,67 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Контент мэйкер'
     )
+
+
+class Suggestion(models.Model):
+    """Рекомендация автора, посчитанная командой compute_suggestions."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор'
+    )
+    score = models.FloatField('Вес')
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_suggestion'
+            )
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, их правит posts.stats."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts = models.IntegerField('Постов', default=0)
+    comments = models.IntegerField('Комментариев', default=0)
+    followers = models.IntegerField('Подписчиков', default=0)
+    following = models.IntegerField('Подписок', default=0)
+
+
+class GroupStats(models.Model):
+    """Счётчики сообщества, их правит posts.stats."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Сообщество'
+    )
+    posts = models.IntegerField('Постов', default=0)
+    last_activity = models.DateTimeField(
+        'Последняя активность', null=True, blank=True
+    )
+
+
+class ImportCheckpoint(models.Model):
+    """Прогресс import_posts; пишется в одной транзакции с пакетом
+    постов, так что после сбоя загрузка продолжается без дублей."""
+    name = models.CharField('Источник', max_length=255, primary_key=True)
+    lines = models.PositiveIntegerField('Прочитано строк', default=0)
+    imported = models.PositiveIntegerField('Загружено', default=0)
+    skipped = models.PositiveIntegerField('Пропущено', default=0)
@@ -0,0 +1,254 @@
+import io
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from core import cache_tags
+from django.core.files.storage import default_storage
+from django.db import connections, router, transaction
+from django.utils import timezone
+from PIL import Image
+
+from . import follow_graph, follow_sets, top_lists
+from .models import Comment, Follow, Group, Post, User
+
+# Показатель Парето: чем меньше, тем сильнее разрыв между популярными
+# авторами и всеми остальными.
+POPULARITY_ALPHA = 1.2
+BURST_SIZE = 20
+BURST_SPREAD = 30 * 60
+WORDS = (
+    'сегодня вчера город море горы дорога утро вечер кофе книга кино '
+    'работа проект друзья семья поездка погода дождь солнце снег лето '
+    'зима весна осень код релиз баг тест идея план музыка концерт'
+).split()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def insert_as_is(model, objects, ignore_conflicts=False):
+    """Вставляет объекты пакетами со значениями полей как есть.
+
+    В отличие от bulk_create, pre_save полей не вызывается (как при
+    загрузке фикстур), так что auto_now_add не затирает заданный pub_date.
+    Сигналы не шлются, id объектам не проставляются: кеши после вставки
+    сбрасывает bulk_inserted().
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    ops = connections[router.db_for_write(model)].ops
+    objects = list(objects)
+    batch_size = max(ops.bulk_batch_size(fields, objects), 1)
+    for chunk in chunked(objects, batch_size):
+        model._base_manager._insert(
+            chunk, fields=fields, raw=True, ignore_conflicts=ignore_conflicts
+        )
+
+
+def _post_tags(pairs):
+    tags = {'posts'}
+    for author_id, group_id in pairs:
+        tags.add(f'author:{author_id}')
+        if group_id is not None:
+            tags.add(f'group:{group_id}')
+    return tags
+
+
+def bulk_inserted(model, objects):
+    """После фиксации сбрасывает то же, что сбросили бы сигналы записи
+    объектов по одному: теги кеша страниц и кешированные подписки."""
+    tags = set()
+    if model is Post:
+        tags = _post_tags((post.author_id, post.group_id) for post in objects)
+        transaction.on_commit(top_lists.invalidate_all)
+    elif model is Comment:
+        post_ids = {comment.post_id for comment in objects}
+        tags = _post_tags(Post.objects.filter(pk__in=post_ids).values_list(
+            'author_id', 'group_id'
+        ))
+        tags.discard('posts')
+        tags.update(f'post:{post_id}' for post_id in post_ids)
+        tags.update(f'author:{comment.author_id}' for comment in objects)
+    elif model is Follow:
+        users = {follow.user_id for follow in objects}
+        tags.update(f'follows:{user_id}' for user_id in users)
+        tags.update(f'author:{user_id}' for user_id in users)
+        tags.update(f'author:{follow.author_id}' for follow in objects)
+        transaction.on_commit(lambda: follow_sets.invalidate(users))
+    if tags:
+        transaction.on_commit(lambda: cache_tags.touch(*tags))
+
+
+class Seeder:
+    def __init__(self, prefix='seed', chunk_size=5000, days=365, rng=None):
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.days = days
+        self.rng = rng or random.Random()
+        self.now = timezone.now()
+        self.rates = {}
+
+    def _insert(self, model, objects, as_is=False, **kwargs):
+        """Число отправленных строк; при ignore_conflicts часть из них
+        могла не вставиться."""
+        started = time.perf_counter()
+        inserted = 0
+        for chunk in chunked(objects, self.chunk_size):
+            if as_is:
+                insert_as_is(model, chunk, **kwargs)
+            else:
+                model.objects.bulk_create(chunk, **kwargs)
+            bulk_inserted(model, chunk)
+            inserted += len(chunk)
+        elapsed = time.perf_counter() - started
+        self.rates[model.__name__] = (inserted, elapsed)
+        return inserted
+
+    def _popularity(self, size):
+        weights = itertools.accumulate(
+            self.rng.paretovariate(POPULARITY_ALPHA) for _ in range(size)
+        )
+        return list(weights)
+
+    def user_ids(self):
+        return list(User.objects.filter(
+            username__startswith=f'{self.prefix}_'
+        ).values_list('id', flat=True))
+
+    def users(self, count):
+        start = User.objects.filter(
+            username__startswith=f'{self.prefix}_'
+        ).count()
+        password = make_password(None)
+        return self._insert(User, (
+            User(
+                username=f'{self.prefix}_{i}',
+                first_name='Автор',
+                last_name=str(i),
+                password=password,
+            )
+            for i in range(start, start + count)
+        ))
+
+    def groups(self, count):
+        start = Group.objects.filter(
+            slug__startswith=f'{self.prefix}-'
+        ).count()
+        return self._insert(Group, (
+            Group(
+                title=f'Сообщество {i}',
+                slug=f'{self.prefix}-{i}',
+                description=f'Описание сообщества {i}',
+            )
+            for i in range(start, start + count)
+        ))
+
+    def images(self, count):
+        names = []
+        for i in range(count):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (960, 339), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{self.prefix}_{i}.jpg', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def _bursty_times(self, count):
+        """Посты идут пачками: центры всплесков равномерны по периоду,
+        их размер распределён по Парето, внутри всплеска — экспонента."""
+        span = self.days * 24 * 60 * 60
+        bursts = [
+            self.rng.uniform(0, span)
+            for _ in range(max(1, count // BURST_SIZE))
+        ]
+        weights = self._popularity(len(bursts))
+        for chunk in chunked(range(count), self.chunk_size):
+            centers = self.rng.choices(
+                bursts, cum_weights=weights, k=len(chunk)
+            )
+            for center in centers:
+                offset = center + self.rng.expovariate(1 / BURST_SPREAD)
+                yield self.now - timedelta(seconds=max(0, span - offset))
+
+    def posts(self, count, image_names=(), image_ratio=0.0):
+        authors = self.user_ids()
+        weights = self._popularity(len(authors))
+        groups = list(Group.objects.values_list('id', flat=True)) + [None]
+
+        def generate():
+            times = self._bursty_times(count)
+            for chunk in chunked(range(count), self.chunk_size):
+                chunk_authors = self.rng.choices(
+                    authors, cum_weights=weights, k=len(chunk)
+                )
+                for author_id in chunk_authors:
+                    image = None
+                    if image_names and self.rng.random() < image_ratio:
+                        image = self.rng.choice(image_names)
+                    yield Post(
+                        text=' '.join(self.rng.choices(
+                            WORDS, k=self.rng.randint(3, 120)
+                        )),
+                        author_id=author_id,
+                        group_id=self.rng.choice(groups),
+                        image=image,
+                        pub_date=next(times),
+                    )
+
+        return self._insert(Post, generate(), as_is=True)
+
+    def comments(self, count):
+        authors = self.user_ids()
+        posts = list(Post.objects.values_list('id', 'pub_date'))
+        weights = self._popularity(len(posts))
+
+        def generate():
+            for chunk in chunked(range(count), self.chunk_size):
+                chunk_posts = self.rng.choices(
+                    posts, cum_weights=weights, k=len(chunk)
+                )
+                for post_id, pub_date in chunk_posts:
+                    delay = timedelta(
+                        seconds=self.rng.expovariate(1 / BURST_SPREAD)
+                    )
+                    yield Comment(
+                        post_id=post_id,
+                        author_id=self.rng.choice(authors),
+                        text=f'Комментарий {self.rng.randrange(10 ** 6)}',
+                        pub_date=min(self.now, pub_date + delay),
+                    )
+
+        return self._insert(Comment, generate(), as_is=True)
+
+    def follows(self, count):
+        """Подписчики выбираются равномерно, а авторы — по Парето, так что
+        число подписчиков у авторов подчиняется степенному закону."""
+        users = self.user_ids()
+        weights = self._popularity(len(users))
+
+        def generate():
+            for chunk in chunked(range(count), self.chunk_size):
+                authors = self.rng.choices(
+                    users, cum_weights=weights, k=len(chunk)
+                )
+                for author_id in authors:
+                    user_id = self.rng.choice(users)
+                    if user_id != author_id:
+                        yield Follow(user_id=user_id, author_id=author_id)
+
+        inserted = self._insert(Follow, generate(), ignore_conflicts=True)
+        follow_graph.invalidate()
+        return inserted
@@ -0,0 +1,149 @@
+from core import cache_tags
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (entities, follow_graph, follow_sets, stats, top_lists,
+               trending)
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk is not None:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    tags = {'posts', f'post:{instance.pk}', f'author:{instance.author_id}'}
+    for group_id in (
+        instance.group_id, getattr(instance, '_previous_group_id', None)
+    ):
+        if group_id is not None:
+            tags.add(f'group:{group_id}')
+    cache_tags.touch(*tags)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    # Списки лент правятся после фиксации: иначе читатель успел бы
+    # собрать и сохранить список без ещё не видимого ему поста.
+    if created:
+        stats.post_created(instance)
+        feeds = top_lists.feeds(instance)
+        transaction.on_commit(lambda: top_lists.add(instance, feeds))
+        transaction.on_commit(lambda: trending.record(
+            instance.pk, instance.group_id, trending.POST_WEIGHT
+        ))
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        stats.post_moved(instance, previous_group_id)
+        post_id, group_id = instance.pk, instance.group_id
+        if previous_group_id is not None:
+            transaction.on_commit(lambda: top_lists.remove(
+                post_id, [f'group:{previous_group_id}']
+            ))
+        if group_id is not None:
+            transaction.on_commit(
+                lambda: top_lists.add(instance, [f'group:{group_id}'])
+            )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    stats.post_deleted(instance)
+    # После удаления у instance уже не будет pk.
+    post_id, feeds = instance.pk, top_lists.feeds(instance)
+    entities.forget_post(post_id)
+    transaction.on_commit(lambda: top_lists.remove(post_id, feeds))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    # Число комментариев поста видно в его карточке во всех лентах, счётчик
+    # комментариев автора — в профиле, последняя активность — в группе.
+    post = instance.post
+    tags = {
+        f'post:{post.pk}',
+        f'author:{post.author_id}',
+        f'author:{instance.author_id}',
+    }
+    if post.group_id is not None:
+        tags.add(f'group:{post.group_id}')
+    cache_tags.touch(*tags)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        group_id = instance.post.group_id
+        stats.comment_created(instance, group_id)
+        transaction.on_commit(lambda: trending.record(
+            instance.post_id, group_id, trending.COMMENT_WEIGHT
+        ))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    stats.comment_deleted(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    # Число подписок и подписчиков видно в профилях обеих сторон.
+    cache_tags.touch(
+        f'follows:{instance.user_id}',
+        f'author:{instance.user_id}',
+        f'author:{instance.author_id}',
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.follow_created(instance)
+        follow_sets.add(instance.user_id, instance.author_id)
+        follow_graph.followed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    stats.follow_deleted(instance)
+    follow_sets.remove(instance.user_id, instance.author_id)
+    follow_graph.unfollowed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    cache_tags.touch('groups', f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields, **kwargs):
+    # Вход пользователя сохраняет только last_login: на страницах он не
+    # виден, и сбрасывать из-за него кеши незачем.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    tags = [f'author:{instance.pk}', f'follows:{instance.pk}']
+    if not created and (update_fields is None or 'username' in update_fields):
+        tags.append('users')
+    cache_tags.touch(*tags)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def entity_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    entities.invalidate(instance)
@@ -0,0 +1,182 @@
+"""Счётчики пользователей и сообществ.
+
+Таблицы UserStats и GroupStats правят сигналы записей запросом
+UPDATE ... SET n = n + 1, без чтения строки, в той же транзакции, что и
+сама запись. Строки заводятся лениво: если строки нет, она считается с
+нуля по исходным таблицам. Массовые вставки сигналов не шлют, после них,
+как и для сверки по расписанию, нужна reconcile() (команда
+reconcile_stats).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (Comment, Follow, Group, GroupStats, Post, User,
+                     UserStats)
+from .seeding import chunked
+
+CHUNK_SIZE = 1000
+USER_COUNTS = {
+    'posts': (Post, 'author'),
+    'comments': (Comment, 'author'),
+    'followers': (Follow, 'author'),
+    'following': (Follow, 'user'),
+}
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def _latest(model, lookup):
+    return Subquery(
+        model.objects.filter(**{lookup: OuterRef('pk')})
+        .order_by('-pub_date').values('pub_date')[:1]
+    )
+
+
+def _user_rows(queryset):
+    return queryset.annotate(**{
+        f'n_{name}': _count(*source) for name, source in USER_COUNTS.items()
+    }).values_list('pk', *(f'n_{name}' for name in USER_COUNTS))
+
+
+def _user_stats(row):
+    user_id, *counts = row
+    return UserStats(user_id=user_id, **dict(zip(USER_COUNTS, counts)))
+
+
+def _group_rows(queryset):
+    return queryset.annotate(
+        n_posts=_count(Post, 'group'),
+        last_post=_latest(Post, 'group'),
+        last_comment=_latest(Comment, 'post__group'),
+    ).values_list('pk', 'n_posts', 'last_post', 'last_comment')
+
+
+def _group_stats(row):
+    group_id, posts, *dates = row
+    dates = [date for date in dates if date is not None]
+    return GroupStats(
+        group_id=group_id, posts=posts,
+        last_activity=max(dates) if dates else None,
+    )
+
+
+SOURCES = {
+    UserStats: (User, _user_rows, _user_stats),
+    GroupStats: (Group, _group_rows, _group_stats),
+}
+
+
+def _create(model, pk):
+    source, rows, make = SOURCES[model]
+    row = rows(source.objects.filter(pk=pk)).first()
+    if row is None:
+        return None
+    stats = make(row)
+    try:
+        with transaction.atomic():
+            stats.save(force_insert=True)
+    except IntegrityError:
+        return model.objects.get(pk=pk)
+    return stats
+
+
+def _bump(model, pk, create, values=None, **deltas):
+    """Сдвигает счётчики строки. Недостающую строку заводит, только если
+    create: при удалении её могли уже снести каскадом вместе с владельцем.
+    Заведённая строка посчитана после записи, так что сдвиг в ней уже
+    учтён."""
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    changes.update(values or {})
+    if not model.objects.filter(pk=pk).update(**changes) and create:
+        _create(model, pk)
+
+
+def for_user(user_id):
+    return (
+        UserStats.objects.filter(pk=user_id).first()
+        or _create(UserStats, user_id)
+    )
+
+
+def for_group(group_id):
+    return (
+        GroupStats.objects.filter(pk=group_id).first()
+        or _create(GroupStats, group_id)
+    )
+
+
+def post_created(post):
+    _bump(UserStats, post.author_id, True, posts=1)
+    if post.group_id is not None:
+        _bump(GroupStats, post.group_id, True,
+              {'last_activity': post.pub_date}, posts=1)
+
+
+def post_deleted(post):
+    _bump(UserStats, post.author_id, False, posts=-1)
+    if post.group_id is not None:
+        _bump(GroupStats, post.group_id, False, posts=-1)
+
+
+def post_moved(post, previous_group_id):
+    if previous_group_id is not None:
+        _bump(GroupStats, previous_group_id, False, posts=-1)
+    if post.group_id is not None:
+        _bump(GroupStats, post.group_id, True, posts=1)
+
+
+def comment_created(comment, group_id):
+    _bump(UserStats, comment.author_id, True, comments=1)
+    if group_id is not None:
+        _bump(GroupStats, group_id, True, {'last_activity': comment.pub_date})
+
+
+def comment_deleted(comment):
+    _bump(UserStats, comment.author_id, False, comments=-1)
+
+
+def follow_created(follow):
+    _bump(UserStats, follow.user_id, True, following=1)
+    _bump(UserStats, follow.author_id, True, followers=1)
+
+
+def follow_deleted(follow):
+    _bump(UserStats, follow.user_id, False, following=-1)
+    _bump(UserStats, follow.author_id, False, followers=-1)
+
+
+def reconcile(chunk_size=CHUNK_SIZE):
+    """Пересчитывает счётчики по исходным таблицам и исправляет
+    расхождения; возвращает число исправленных строк по моделям.
+
+    Пересчёт и запись не атомарны: сдвиг, пришедший между ними, будет
+    перезаписан и поправится следующей сверкой.
+    """
+    fixed = {}
+    for model, (source, rows, make) in SOURCES.items():
+        fields = [
+            field.attname for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        fixed[model.__name__] = 0
+        queryset = rows(source.objects.order_by('pk'))
+        for chunk in chunked(queryset.iterator(chunk_size), chunk_size):
+            fresh = [make(row) for row in chunk]
+            existing = model.objects.in_bulk([stats.pk for stats in fresh])
+            missing = [stats for stats in fresh if stats.pk not in existing]
+            changed = [
+                stats for stats in fresh if stats.pk in existing and any(
+                    getattr(stats, field) != getattr(existing[stats.pk], field)
+                    for field in fields
+                )
+            ]
+            model.objects.bulk_create(missing)
+            model.objects.bulk_update(changed, fields)
+            fixed[model.__name__] += len(missing) + len(changed)
+    return fixed
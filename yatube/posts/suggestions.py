@@ -0,0 +1,170 @@
+"""Рекомендации «кого почитать».
+
+Считаются пакетно командой compute_suggestions по графу подписок
+(см. follow_graph) и хранятся в таблице Suggestion. Вес кандидата
+складывается из двух сигналов: на него подписаны те, на кого подписан
+пользователь (друзья друзей), и на него подписаны читатели тех же
+авторов (совместные подписки). Итог делится на корень из числа
+подписчиков кандидата, чтобы не советовать всем одних и тех же
+популярных авторов. Views получают готовый список одним обращением к
+кешу.
+"""
+import heapq
+import math
+import random
+from collections import Counter
+from functools import lru_cache, partial
+
+from core import cache_tags
+from django.core.cache import cache
+from django.db import transaction
+
+from . import follow_graph, follow_sets
+from .app_settings import (SUGGESTIONS_PER_USER, SUGGESTIONS_SHOWN,
+                           SUGGESTIONS_TIMEOUT)
+from .models import Suggestion
+
+TAGS = ('suggestions', 'users')
+FRIENDS_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.5
+# Сколько соседей узла учитывать, включая подписки самого пользователя:
+# иначе один автор с миллионом подписчиков съест всё время расчёта.
+MAX_FANOUT = 200
+# Совместные подписки автора — что ещё читают его читатели — оцениваются
+# по небольшой выборке, считаются один раз на автора за пересчёт и
+# хранятся только лучшими CO_FOLLOW_KEPT кандидатами.
+CO_FOLLOW_READERS = 20
+CO_FOLLOW_FOLLOWS = 50
+CO_FOLLOW_KEPT = 50
+CO_FOLLOW_CACHE_SIZE = 10000
+CHUNK_SIZE = 1000
+
+
+def _sample(nodes, rng, size=None):
+    """Не больше size (по умолчанию MAX_FANOUT) случайных соседей.
+    Отрезки CSR отсортированы по id, и их начало отдавало бы предпочтение
+    старым аккаунтам."""
+    size = MAX_FANOUT if size is None else size
+    if len(nodes) <= size:
+        return nodes
+    return [nodes[index] for index in rng.sample(range(len(nodes)), size)]
+
+
+def co_followed(graph, author_id):
+    """Кандидаты, которых читают читатели автора, с весом. Выборка
+    зависит только от author_id, поэтому результат годится для всех
+    пользователей, читающих этого автора."""
+    rng = random.Random(author_id)
+    readers = Counter()
+    for reader_id in _sample(
+        graph.followers.neighbors(author_id), rng, CO_FOLLOW_READERS
+    ):
+        readers.update(_sample(
+            graph.following.neighbors(reader_id), rng, CO_FOLLOW_FOLLOWS
+        ))
+    weight = 1 / math.sqrt(graph.followers.degree(author_id))
+    return {
+        candidate: count * weight
+        for candidate, count in readers.most_common(CO_FOLLOW_KEPT)
+    }
+
+
+def score(graph, user_id, limit=SUGGESTIONS_PER_USER, rng=None,
+          co_follows=None):
+    """Лучшие кандидаты для пользователя: список (вес, id автора).
+    Выборка соседей по умолчанию зависит только от user_id, так что
+    пересчёт на том же графе даёт те же рекомендации. co_follows(author_id)
+    заменяет co_followed(graph, author_id), например кешированной."""
+    following = graph.following.neighbors(user_id)
+    if not following:
+        return []
+    rng = rng or random.Random(user_id)
+    if co_follows is None:
+        def co_follows(author_id):
+            return co_followed(graph, author_id)
+    friends = Counter()
+    co_follow = Counter()
+    for author_id in _sample(following, rng):
+        friends.update(_sample(graph.following.neighbors(author_id), rng))
+        co_follow.update(co_follows(author_id))
+    excluded = set(following)
+    excluded.add(user_id)
+    candidates = (set(friends) | set(co_follow)) - excluded
+    return heapq.nlargest(limit, (
+        (
+            (FRIENDS_WEIGHT * friends[candidate]
+             + CO_FOLLOW_WEIGHT * co_follow[candidate])
+            / math.sqrt(graph.followers.degree(candidate)),
+            candidate,
+        )
+        for candidate in candidates
+    ))
+
+
+def compute_all(graph=None, chunk_size=CHUNK_SIZE):
+    """Пересчитывает рекомендации всех пользователей; возвращает число
+    записанных строк. Каждая порция пользователей заменяется целиком в
+    своей транзакции, поэтому читатели не видят полупустых списков."""
+    if graph is None:
+        graph = follow_graph.from_database()
+    co_follows = lru_cache(CO_FOLLOW_CACHE_SIZE)(
+        partial(co_followed, graph)
+    )
+    written = 0
+    for start in range(0, graph.nodes, chunk_size):
+        users = range(start, min(start + chunk_size, graph.nodes))
+        rows = [
+            Suggestion(user_id=user_id, author_id=author_id, score=weight)
+            for user_id in users
+            for weight, author_id in score(
+                graph, user_id, co_follows=co_follows
+            )
+        ]
+        with transaction.atomic():
+            Suggestion.objects.filter(
+                user_id__gte=users.start, user_id__lt=users.stop
+            ).delete()
+            Suggestion.objects.bulk_create(rows)
+        written += len(rows)
+    cache_tags.touch('suggestions')
+    return written
+
+
+def _key(user_id):
+    return f'suggestions:{user_id}'
+
+
+def _load(user_id):
+    rows = Suggestion.objects.filter(user_id=user_id).values_list(
+        'author_id', 'author__username', 'author__first_name',
+        'author__last_name',
+    )[:SUGGESTIONS_PER_USER]
+    return [
+        {
+            'id': author_id,
+            'username': username,
+            'full_name': f'{first_name} {last_name}'.strip(),
+        }
+        for author_id, username, first_name, last_name in rows
+    ]
+
+
+def for_user(user_id, followed=None, exclude=()):
+    """Рекомендации для показа. Версии тегов и сам список читаются
+    одним get_many; уже подписанные авторы отсеиваются по followed."""
+    tag_keys = [cache_tags.key(tag) for tag in TAGS]
+    found = cache.get_many(tag_keys + [_key(user_id)])
+    versions = [found.get(key) for key in tag_keys]
+    if None in versions:
+        versions = cache_tags.versions(*TAGS)
+    cached = found.get(_key(user_id))
+    if cached is None or cached['versions'] != versions:
+        cached = {'versions': versions, 'authors': _load(user_id)}
+        cache.set(_key(user_id), cached, SUGGESTIONS_TIMEOUT)
+    if followed is None:
+        followed = follow_sets.load(user_id)
+    return [
+        author for author in cached['authors']
+        if author['id'] not in exclude
+        and not follow_sets.contains(followed, author['id'])
+    ][:SUGGESTIONS_SHOWN]
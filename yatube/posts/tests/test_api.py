@@ -0,0 +1,117 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Follow, Group, Post, User
+from posts.seeding import insert_as_is
+
+API_INDEX_URL = reverse('posts:api_index')
+API_FOLLOW_URL = reverse('posts:api_follow_index')
+
+
+class FeedApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        now = timezone.now()
+        # Одинаковые даты у пар постов проверяют, что курсор различает
+        # их по id.
+        insert_as_is(Post, [
+            Post(
+                author=cls.author,
+                text=f'Пост {i}',
+                group=cls.group if i % 2 else None,
+                pub_date=now - timedelta(minutes=i // 2),
+            )
+            for i in range(7)
+        ])
+        cls.posts = list(Post.objects.order_by('id'))
+
+    def setUp(self):
+        self.client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cursor_walks_whole_feed_in_order(self):
+        url = f'{API_INDEX_URL}?limit=3'
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 3)
+            ids.extend(post['id'] for post in data['results'])
+            url = data['next']
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_sparse_fields(self):
+        data = self.client.get(
+            API_INDEX_URL, {'fields': 'id,group', 'limit': 1}
+        ).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'group'})
+
+    def test_bad_params(self):
+        for params in (
+            {'fields': 'password'},
+            {'limit': '0'},
+            {'limit': 'many'},
+            {'cursor': '!!!'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(API_INDEX_URL, params)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
+    def test_group_and_profile_feeds(self):
+        for url, count in (
+            (reverse('posts:api_group_list', args=[self.group.slug]), 3),
+            (reverse('posts:api_profile', args=[self.author.username]), 7),
+            (reverse('posts:api_profile', args=[self.user.username]), 0),
+        ):
+            with self.subTest(url=url):
+                data = self.client.get(url, {'limit': 100}).json()
+                self.assertEqual(len(data['results']), count)
+
+    def test_not_modified_until_feed_changes(self):
+        url = reverse('posts:api_group_list', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(author=self.user, text='Новый', group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['results'][0]['text'], 'Новый')
+
+    def test_group_rename_changes_etag(self):
+        etag = self.client.get(API_INDEX_URL)['ETag']
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        response = self.client.get(API_INDEX_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.get(
+            API_INDEX_URL, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_follow_feed(self):
+        response = self.client.get(API_FOLLOW_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertIn('error', response.json())
+        response = self.authorized_client.get(API_FOLLOW_URL)
+        self.assertEqual(response.json()['results'], [])
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(
+            API_FOLLOW_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.json()['results']), 7)
@@ -0,0 +1,102 @@
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+from posts import benchmark, urls
+from posts.models import Follow, Group, Post, User
+
+
+class ScenarioTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='bench_user')
+        cls.target = User.objects.create_user(username='bench_target')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.post = Post.objects.create(
+            author=cls.target, group=cls.group, text='Тестовый пост'
+        )
+        cls.post.comments.create(author=cls.user, text='Комментарий')
+        cls.own_post = Post.objects.create(author=cls.user, text='Свой пост')
+
+    def test_authenticated_scenario_covers_every_route(self):
+        Follow.objects.create(user=self.user, author=self.target)
+        scenario = benchmark.Scenario(self.user, self.target)
+        routes = dict(scenario.routes())
+        self.assertEqual(
+            set(routes), {pattern.name for pattern in urls.urlpatterns}
+        )
+        self.assertIn(f'/posts/{self.own_post.id}/edit/', routes['post_edit'])
+        self.assertIn(self.group.slug, routes['group_list'])
+        self.assertTrue(scenario.cookie)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_anonymous_scenario_skips_own_routes(self):
+        scenario = benchmark.Scenario(None, self.target)
+        routes = dict(scenario.routes())
+        self.assertFalse(set(routes) & set(benchmark.OWN_ROUTES))
+        self.assertEqual(scenario.cookie, '')
+
+
+class ReportTests(TestCase):
+    def setUp(self):
+        self.benchmarks_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.benchmarks_dir, True)
+
+    def test_percentiles_use_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark._percentile(values, 50), 50)
+        self.assertEqual(benchmark._percentile(values, 95), 95)
+        self.assertEqual(benchmark._percentile(values, 99), 99)
+        self.assertEqual(benchmark._percentile([7], 99), 7)
+        self.assertEqual(benchmark._percentile([1, 2, 3], 50), 2)
+
+    def test_summary_counts_errors_and_survives_json(self):
+        samples = {
+            ('index', 'anonymous'): [
+                (0.001 * i, 2, 200) for i in range(1, 10)
+            ] + [(0.01, 2, None)],
+            ('profile', 'authenticated'): [(0.02, 4, 500), (0.04, 6, 200)],
+        }
+        result = benchmark.summarize(samples, 2.0)
+        index = result['routes']['anonymous index']
+        self.assertEqual(index['requests'], 10)
+        self.assertEqual(index['errors'], 1)
+        self.assertEqual(index['throughput'], 5.0)
+        self.assertEqual(index['p50'], 5.0)
+        self.assertEqual(index['p99'], 10.0)
+        profile = result['routes']['authenticated profile']
+        self.assertEqual(profile['errors'], 1)
+        self.assertEqual(profile['queries'], 5)
+        self.assertEqual(result['total']['errors'], 2)
+        self.assertEqual(result['total']['requests'], 12)
+        with mock.patch('posts.benchmark.BENCHMARKS_DIR',
+                        self.benchmarks_dir):
+            path = benchmark.save_baseline('base', result)
+            self.assertEqual(benchmark.load_baseline('base'), result)
+        with open(path) as f:
+            self.assertIn('anonymous index', json.load(f)['routes'])
+
+    def test_compare_reports_regressions_over_tolerance(self):
+        baseline = {'routes': {'anonymous index': {
+            'p50': 10.0, 'p95': 20.0, 'queries': 2,
+        }}}
+        result = {'routes': {'anonymous index': {
+            'p50': 10.5, 'p95': 30.0, 'queries': 2,
+        }}}
+        self.assertEqual(
+            benchmark.compare(result, baseline, 10),
+            [('anonymous index', 'p95', 20.0, 30.0)],
+        )
+
+    def test_exception_while_streaming_body_is_an_error(self):
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            yield b'first'
+            raise RuntimeError('обрыв')
+
+        status = benchmark._call(application, '/', '')
+        self.assertIsNone(status)
+        self.assertTrue(benchmark._failed(status))
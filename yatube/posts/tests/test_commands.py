@@ -0,0 +1,152 @@
+import gzip
+import json
+import os
+import random
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from posts import follow_sets
+from posts.management.commands.import_posts import Command as ImportCommand
+from posts.models import (Comment, Follow, Group, ImportCheckpoint, Post,
+                          User)
+from posts.seeding import Seeder
+
+
+class SeedYatubeTests(TestCase):
+    def test_seed_creates_rows_with_spread_dates(self):
+        out = StringIO()
+        call_command(
+            'seed_yatube', users=20, groups=3, posts=60, comments=100,
+            follows=80, chunk_size=25, seed=1, stdout=out
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 100)
+        follows = Follow.objects.count()
+        self.assertTrue(0 < follows <= 80)
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        dates = set(Post.objects.values_list('pub_date', flat=True))
+        self.assertGreater(len(dates), 1)
+        self.assertIn('строк/с', out.getvalue())
+
+
+class ExportImportPostsTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.path = os.path.join(self.tmp_dir, 'posts.jsonl.gz')
+        self.user = User.objects.create_user(username='testuser')
+        self.group = Group.objects.create(title='Группа', slug='test-slug')
+        for i in range(7):
+            Post.objects.create(
+                author=self.user,
+                group=self.group if i % 2 else None,
+                text=f'Тестовый пост {i}',
+            )
+
+    def test_export_and_import_round_trip(self):
+        call_command('export_posts', self.path, chunk_size=3,
+                     stderr=StringIO())
+        with gzip.open(self.path, 'rt') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 7)
+        self.assertEqual(records[1]['author'], 'testuser')
+        self.assertEqual(records[1]['group'], 'test-slug')
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+        dates = dict(Post.objects.values_list('text', 'pub_date'))
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        call_command('import_posts', self.path, batch_size=2,
+                     create_missing=True, stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertEqual(
+            dict(Post.objects.values_list('text', 'pub_date')), dates
+        )
+        self.assertEqual(
+            Post.objects.filter(group__slug='test-slug').count(), 3
+        )
+
+    def test_import_resumes_after_crash_without_duplicates(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        Post.objects.all().delete()
+        original = ImportCommand.import_batch
+        calls = []
+
+        def crash_on_third_batch(command, *args):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError('сбой')
+            return original(command, *args)
+
+        with mock.patch.object(
+                ImportCommand, 'import_batch', crash_on_third_batch):
+            with self.assertRaises(RuntimeError):
+                call_command('import_posts', self.path, batch_size=2,
+                             stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(ImportCheckpoint.objects.get().lines, 4)
+        call_command('import_posts', self.path, batch_size=2, resume=True,
+                     stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_import_reconciles_stats_once(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        Post.objects.all().delete()
+        with mock.patch('posts.stats.reconcile') as reconcile:
+            call_command('import_posts', self.path, batch_size=2,
+                         stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 7)
+        reconcile.assert_called_once_with()
+
+    def test_import_skips_unknown_authors(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        call_command('import_posts', self.path, stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 0)
+
+
+# Кеши сбрасываются после фиксации транзакции.
+class BulkInsertCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.author = User.objects.create_user(username='seed_0')
+        self.reader = User.objects.create_user(username='seed_1')
+        Post.objects.create(author=self.author, text='Старый пост')
+
+    def test_import_purges_profile(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        client = Client()
+        etag = client.get(url)['ETag']
+        path = os.path.join(self.tmp_dir, 'posts.jsonl')
+        with open(path, 'w') as f:
+            f.write(json.dumps({
+                'author': self.author.username,
+                'text': 'Загруженный пост',
+                'pub_date': '2030-01-01T00:00:00+00:00',
+            }) + '\n')
+        call_command('import_posts', path, stderr=StringIO())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Загруженный пост')
+        self.assertContains(response, 'Всего постов: 2')
+
+    def test_seeded_follows_reset_follow_sets(self):
+        self.assertEqual(list(follow_sets.load(self.reader.id)), [])
+        Seeder(rng=random.Random(1)).follows(20)
+        self.assertEqual(
+            list(follow_sets.load(self.reader.id)),
+            list(Follow.objects.filter(user=self.reader)
+                 .values_list('author_id', flat=True)),
+        )
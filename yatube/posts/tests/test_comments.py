@@ -0,0 +1,82 @@
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Post, User
+from ..seeding import insert_as_is
+
+
+@mock.patch('posts.views.COMMENTS_PER_PAGE', 3)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(3)
+        ]
+        cls.post = Post.objects.create(author=cls.users[0], text='Пост')
+        now = timezone.now()
+        insert_as_is(Comment, [
+            Comment(
+                post=cls.post,
+                author=cls.users[i % 3],
+                text=f'Комментарий {i}',
+                pub_date=now - timedelta(minutes=i // 2),
+            )
+            for i in range(7)
+        ])
+        cls.expected = list(
+            Comment.objects.order_by('-pub_date', '-id')
+            .values_list('text', flat=True)
+        )
+        cls.detail_url = reverse('posts:post_detail', args=[cls.post.id])
+        cls.comments_url = reverse(
+            'posts:post_comments', args=[cls.post.id]
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_first_page_embedded_in_post_detail(self):
+        response = self.client.get(self.detail_url)
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments], self.expected[:3]
+        )
+        self.assertContains(
+            response, f'{self.comments_url}?cursor={comments.next_cursor}'
+        )
+
+    def test_fragments_walk_all_comments(self):
+        texts = []
+        url = self.comments_url
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertTemplateNotUsed(response, 'base.html')
+            comments = response.context['comments']
+            texts += [comment.text for comment in comments]
+            url = comments.next_cursor and (
+                f'{self.comments_url}?cursor={comments.next_cursor}'
+            )
+        self.assertEqual(texts, self.expected)
+
+    def test_authors_loaded_with_comments(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.comments_url)
+        self.assertContains(response, self.users[1].username)
+
+    def test_bad_cursor(self):
+        response = self.client.get(self.comments_url, {'cursor': 'плохой'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_unknown_post(self):
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.id + 100])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
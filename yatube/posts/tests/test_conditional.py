@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+from django.contrib.auth.models import update_last_login
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = {
+            'post_detail': reverse('posts:post_detail', args=[self.post.id]),
+            'profile': reverse('posts:profile', args=[self.author.username]),
+            'group_list': reverse('posts:group_list', args=[self.group.slug]),
+        }
+
+    def assertNotModified(self, client, url, **headers):
+        response = client.get(url, **headers)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def assertModified(self, client, url, **headers):
+        response = client.get(url, **headers)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_repeat_visit_not_modified(self):
+        for client in (self.guest_client, self.authorized_client):
+            for name, url in self.urls.items():
+                with self.subTest(name=name):
+                    etag = client.get(url)['ETag']
+                    self.assertNotModified(
+                        client, url, HTTP_IF_NONE_MATCH=etag
+                    )
+
+    def test_last_modified_only_for_anonymous(self):
+        url = self.urls['profile']
+        response = self.guest_client.get(url)
+        self.assertNotModified(
+            self.guest_client, url,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_etag_differs_per_viewer(self):
+        url = self.urls['post_detail']
+        etag = self.guest_client.get(url)['ETag']
+        self.assertModified(
+            self.authorized_client, url, HTTP_IF_NONE_MATCH=etag
+        )
+
+    def test_changes_invalidate_validator(self):
+        changes = {
+            'post_detail': lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='Коммент'
+            ),
+            'profile': lambda: Post.objects.create(
+                author=self.author, text='Новый пост'
+            ),
+            'group_list': lambda: Post.objects.create(
+                author=self.user, text='В группу', group=self.group
+            ),
+        }
+        for name, change in changes.items():
+            with self.subTest(name=name):
+                url = self.urls[name]
+                etag = self.guest_client.get(url)['ETag']
+                change()
+                self.assertModified(
+                    self.guest_client, url, HTTP_IF_NONE_MATCH=etag
+                )
+
+    def test_follow_invalidates_profile_for_follower(self):
+        url = self.urls['profile']
+        etag = self.authorized_client.get(url)['ETag']
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertTrue(response.context['following'])
+
+    def test_stats_changes_invalidate_validator(self):
+        changes = {
+            'profile': lambda: Follow.objects.create(
+                user=self.user, author=self.author
+            ),
+            'group_list': lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='Коммент'
+            ),
+        }
+        for name, change in changes.items():
+            with self.subTest(name=name):
+                url = self.urls[name]
+                etag = self.guest_client.get(url)['ETag']
+                change()
+                self.assertModified(
+                    self.guest_client, url, HTTP_IF_NONE_MATCH=etag
+                )
+
+    def test_login_keeps_validator(self):
+        url = self.urls['profile']
+        etag = self.guest_client.get(url)['ETag']
+        update_last_login(None, self.author)
+        self.assertNotModified(self.guest_client, url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_missing_object_is_not_found(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.id + 100])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
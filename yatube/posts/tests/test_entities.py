@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from .. import entities
+from ..models import Group, User
+
+
+class EntityCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+
+    def test_hot_lookups_without_queries(self):
+        entities.user('author')
+        entities.group('group')
+        with self.assertNumQueries(0):
+            self.assertEqual(entities.user('author'), self.user)
+            self.assertEqual(entities.group('group').title, 'Группа')
+
+    def test_cached_user_has_no_password(self):
+        entities.user('author')
+        cached = cache.get(entities._key(User, 'author'))
+        self.assertEqual(cached, self.user)
+        self.assertIn('password', cached.get_deferred_fields())
+        self.assertNotIn('password', cached.__dict__)
+
+    def test_missing_objects_cached(self):
+        with self.assertRaises(Http404):
+            entities.user('ghost')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            entities.user('ghost')
+        ghost = User.objects.create_user(username='ghost')
+        self.assertEqual(entities.user('ghost'), ghost)
+
+    def test_rename_invalidates_both_names(self):
+        entities.user('author')
+        self.user.username = 'renamed'
+        self.user.save()
+        with self.assertRaises(Http404):
+            entities.user('author')
+        self.assertEqual(entities.user('renamed').username, 'renamed')
+
+    def test_group_edit_invalidates(self):
+        entities.group('group')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(entities.group('group').title, 'Новое название')
+
+    def test_login_keeps_cached_user(self):
+        entities.user('author')
+        self.client.force_login(self.user)
+        with self.assertNumQueries(0):
+            entities.user('author')
+
+    def test_profile_resolves_author_from_cache(self):
+        self.client.get(reverse('posts:profile', args=[self.user.username]))
+        with self.assertNumQueries(0):
+            entities.user(self.user.username)
+        response = self.client.get(reverse('posts:profile', args=['ghost']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,167 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import exports
+from posts.models import Comment, Follow, Group, Post, User
+
+EXPORT_URL = reverse('posts:data_export')
+LOGIN_URL = reverse('users:login')
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DataExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        Post.objects.create(author=cls.author, text='Чужой пост')
+        Comment.objects.create(post=cls.post, author=cls.user, text='Коммент')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_guest_redirected_to_login(self):
+        response = self.guest_client.get(EXPORT_URL)
+        self.assertRedirects(response, f'{LOGIN_URL}?next={EXPORT_URL}')
+
+    def test_ndjson_contains_only_own_data(self):
+        response = self.authorized_client.get(EXPORT_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        records = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        types = [record['type'] for record in records]
+        self.assertEqual(types, ['user', 'post', 'comment', 'follow'])
+        self.assertEqual(records[1]['text'], self.post.text)
+        self.assertEqual(records[1]['group'], self.group.slug)
+        self.assertEqual(records[3]['author'], self.author.username)
+
+    def test_zip_contains_data_and_images(self):
+        response = self.authorized_client.get(EXPORT_URL, {'format': 'zip'})
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        self.assertEqual(
+            archive.namelist(),
+            ['data.ndjson', f'images/{self.post.image.name}']
+        )
+        self.assertEqual(
+            archive.read(f'images/{self.post.image.name}'), SMALL_GIF
+        )
+
+    def test_range_request_resumes_download(self):
+        for export_format in ('ndjson', 'zip'):
+            with self.subTest(export_format=export_format):
+                response = self.authorized_client.get(
+                    EXPORT_URL, {'format': export_format}
+                )
+                full = b''.join(response.streaming_content)
+                response = self.authorized_client.get(
+                    EXPORT_URL, {'format': export_format},
+                    HTTP_RANGE='bytes=10-',
+                    HTTP_IF_RANGE=response['ETag'],
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT
+                )
+                self.assertEqual(
+                    response['Content-Range'],
+                    f'bytes 10-{len(full) - 1}/{len(full)}'
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content), full[10:]
+                )
+
+    def test_range_after_full_download_streams_once(self):
+        response = self.authorized_client.get(EXPORT_URL, {'format': 'zip'})
+        full = b''.join(response.streaming_content)
+        with mock.patch('posts.exports.zip_stream',
+                        wraps=exports.zip_stream) as zip_stream:
+            response = self.authorized_client.get(
+                EXPORT_URL, {'format': 'zip'},
+                HTTP_RANGE=f'bytes={len(full) - 5}-',
+            )
+            self.assertEqual(b''.join(response.streaming_content), full[-5:])
+        self.assertEqual(zip_stream.call_count, 1)
+
+    def test_invalid_range_ignored_and_unsatisfiable_rejected(self):
+        response = self.authorized_client.get(
+            EXPORT_URL, HTTP_RANGE='bytes=5-2'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        full = b''.join(response.streaming_content)
+        response = self.authorized_client.get(
+            EXPORT_URL, HTTP_RANGE=f'bytes={len(full)}-'
+        )
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response['Content-Range'], f'bytes */{len(full)}')
+
+    def test_etag_changes_on_same_length_edit_and_new_image(self):
+        for export_format in ('ndjson', 'zip'):
+            with self.subTest(export_format=export_format):
+                def etag():
+                    return self.authorized_client.get(
+                        EXPORT_URL, {'format': export_format}
+                    )['ETag']
+
+                before = etag()
+                Post.objects.filter(pk=self.post.pk).update(
+                    text='Тестовый пёст'
+                )
+                edited = etag()
+                self.assertNotEqual(edited, before)
+                Post.objects.filter(pk=self.post.pk).update(
+                    image='posts/other.gif'
+                )
+                self.assertNotEqual(etag(), edited)
+                Post.objects.filter(pk=self.post.pk).update(
+                    text=self.post.text, image=self.post.image.name
+                )
+                self.assertEqual(etag(), before)
+
+    def test_stale_if_range_returns_full_body(self):
+        response = self.authorized_client.get(
+            EXPORT_URL, HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
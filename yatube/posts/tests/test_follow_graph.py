@@ -0,0 +1,163 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow, Post, User
+
+EDGES = [(1, 2), (1, 3), (2, 1), (2, 3), (3, 1), (4, 3)]
+
+
+class GraphTests(SimpleTestCase):
+    def setUp(self):
+        self.graph = follow_graph.Graph.build(1, 5, iter(EDGES))
+
+    def test_build_both_directions(self):
+        self.assertEqual(list(self.graph.following.neighbors(2)), [1, 3])
+        self.assertEqual(list(self.graph.followers.neighbors(3)), [1, 2, 4])
+        self.assertEqual(self.graph.followers.degree(1), 2)
+        self.assertEqual(self.graph.following.degree(99), 0)
+        self.assertTrue(self.graph.following.has_edge(4, 3))
+        self.assertFalse(self.graph.following.has_edge(3, 4))
+
+    def test_snapshot_opened_through_mmap(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        path = os.path.join(tmp_dir, 'graph.bin')
+        self.graph.save(path)
+        opened = follow_graph.Graph.open(path)
+        self.assertIsInstance(opened.following.targets, memoryview)
+        self.assertEqual(opened.version, 1)
+        for old, new in zip(self.graph.parts(), opened.parts()):
+            self.assertEqual(list(old), list(new))
+
+    def test_delta_overlay(self):
+        graph = follow_graph.FollowGraph(
+            self.graph, added={(4, 1)}, removed={(3, 1)}
+        )
+        self.assertEqual(graph.followers(1), {2, 4})
+        self.assertEqual(graph.followers_count(1), 2)
+        self.assertEqual(graph.following_count(3), 0)
+        self.assertTrue(graph.follows(4, 1))
+        self.assertFalse(graph.follows(3, 1))
+        self.assertEqual(graph.mutual(2), {1})
+        self.assertEqual(graph.known_followers(1, 3), {2})
+        self.assertEqual(graph.common_following(1, 2), {3})
+
+
+class PublishedGraphTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        patcher = mock.patch.multiple(
+            follow_graph, FOLLOW_GRAPH_DIR=self.tmp_dir, _graph=None
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cache.clear)
+        self.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=self.users[0], author=self.users[2])
+        Follow.objects.create(user=self.users[1], author=self.users[2])
+
+    def test_signals_update_published_graph(self):
+        call_command('snapshot_follow_graph', stdout=StringIO())
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 1)
+        Follow.objects.create(user=self.users[0], author=self.users[1])
+        Follow.objects.filter(user=self.users[1]).delete()
+        with self.assertNumQueries(0):
+            graph = follow_graph.current()
+            self.assertEqual(graph.followers_count(self.users[2].id), 1)
+            self.assertTrue(graph.follows(self.users[0].id, self.users[1].id))
+        # Новый воркер открывает тот же снимок и видит ту же дельту.
+        follow_graph._graph = None
+        graph = follow_graph.current()
+        self.assertIsInstance(graph.graph.following.targets, memoryview)
+        self.assertEqual(
+            graph.followers(self.users[2].id), {self.users[0].id}
+        )
+
+    def test_large_delta_served_until_snapshot(self):
+        call_command('snapshot_follow_graph', stdout=StringIO())
+        version = follow_graph._graph.version
+        with mock.patch.object(follow_graph, 'FOLLOW_GRAPH_MAX_DELTA', 0):
+            Follow.objects.create(user=self.users[0], author=self.users[1])
+            with self.assertNumQueries(0):
+                graph = follow_graph.current()
+            self.assertEqual(graph.graph.version, version)
+            self.assertTrue(graph.follows(self.users[0].id, self.users[1].id))
+            self.assertTrue(follow_graph.needs_rebuild())
+            call_command(
+                'snapshot_follow_graph', if_needed=True, stdout=StringIO()
+            )
+        graph = follow_graph.current()
+        self.assertNotEqual(graph.graph.version, version)
+        self.assertEqual(
+            cache.get(follow_graph.DELTA_KEY)['added'], set()
+        )
+        self.assertTrue(graph.follows(self.users[0].id, self.users[1].id))
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 1)
+        out = StringIO()
+        call_command('snapshot_follow_graph', if_needed=True, stdout=out)
+        self.assertIn('Снимок актуален', out.getvalue())
+
+    def test_follows_during_rebuild_move_to_new_delta(self):
+        call_command('snapshot_follow_graph', stdout=StringIO())
+        old_version = follow_graph._graph.version
+        pair = (self.users[0].id, self.users[1].id)
+        build = follow_graph.from_database
+        during = []
+
+        def build_then_follow(version):
+            graph = build(version)
+            Follow.objects.create(user=self.users[0], author=self.users[1])
+            # Другой воркер посреди сборки: старый снимок и старая дельта.
+            follow_graph._graph = None
+            during.append(follow_graph.current())
+            return graph
+
+        with mock.patch.object(
+                follow_graph, 'from_database', build_then_follow):
+            call_command('snapshot_follow_graph', stdout=StringIO())
+        self.assertEqual(during[0].graph.version, old_version)
+        self.assertTrue(during[0].follows(*pair))
+        follow_graph._graph = None
+        graph = follow_graph.current()
+        self.assertNotEqual(graph.graph.version, old_version)
+        self.assertTrue(graph.follows(*pair))
+        self.assertEqual(cache.get(follow_graph.DELTA_KEY)['added'], {pair})
+
+    def test_requests_never_build_graph(self):
+        with self.assertNumQueries(0):
+            graph = follow_graph.current()
+        self.assertEqual(graph.followers(self.users[2].id), set())
+        call_command('snapshot_follow_graph', stdout=StringIO())
+        follow_graph.invalidate()
+        follow_graph._graph = None
+        with self.assertNumQueries(0):
+            graph = follow_graph.current()
+        self.assertEqual(graph.followers_count(self.users[2].id), 2)
+
+    def test_profile_shows_degrees_and_known_followers(self):
+        call_command('snapshot_follow_graph', stdout=StringIO())
+        Post.objects.create(author=self.users[2], text='Пост')
+        Follow.objects.create(user=self.users[0], author=self.users[1])
+        client = Client()
+        client.force_login(self.users[0])
+        response = client.get(
+            reverse('posts:profile', args=[self.users[2].username])
+        )
+        self.assertEqual(response.context['author_stats'].followers, 2)
+        self.assertEqual(
+            list(response.context['known_followers']), [self.users[1]]
+        )
+        self.assertContains(response, 'Подписчиков: 2')
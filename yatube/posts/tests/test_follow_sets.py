@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from .. import follow_sets
+from ..models import Follow, User
+
+
+class FollowSetTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=self.user, author=self.authors[2])
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def cached(self):
+        return cache.get(follow_sets._key(self.user.id))
+
+    def test_follow_and_unfollow_update_cached_set(self):
+        follow_sets.load(self.user.id)
+        self.assertEqual(list(self.cached()), [self.authors[2].id])
+        username = self.authors[0].username
+        self.client.get(reverse('posts:profile_follow', args=[username]))
+        self.assertEqual(
+            list(self.cached()), [self.authors[0].id, self.authors[2].id]
+        )
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[username]),
+            HTTP_REFERER='/',
+        )
+        self.assertEqual(list(self.cached()), [self.authors[2].id])
+
+    def test_checks_use_cached_set(self):
+        follow_sets.load(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_sets.is_following(self.user.id, self.authors[2].id)
+            )
+            self.assertFalse(
+                follow_sets.is_following(self.user.id, self.authors[1].id)
+            )
+        response = self.client.get(
+            reverse('posts:profile', args=[self.authors[2].username])
+        )
+        self.assertTrue(response.context['following'])
+
+    def test_rolled_back_follow_not_cached(self):
+        follow_sets.load(self.user.id)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.authors[1])
+            raise RuntimeError
+        self.assertEqual(list(self.cached()), [self.authors[2].id])
+
+    def test_set_read_before_follow_is_not_stored(self):
+        store = follow_sets._store
+
+        def follow_then_store(user_id, authors, version):
+            Follow.objects.create(user=self.user, author=self.authors[1])
+            store(user_id, authors, version)
+
+        with mock.patch('posts.follow_sets._store', follow_then_store):
+            self.assertEqual(
+                list(follow_sets.load(self.user.id)), [self.authors[2].id]
+            )
+        self.assertIsNone(self.cached())
+        self.assertTrue(
+            follow_sets.is_following(self.user.id, self.authors[1].id)
+        )
+
+    def test_set_not_cached_inside_uncommitted_transaction(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            follow_sets.load(self.user.id)
+            raise RuntimeError
+        self.assertIsNone(self.cached())
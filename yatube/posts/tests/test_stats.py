@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import stats
+from ..models import (Comment, Follow, Group, GroupStats, Post, User,
+                      UserStats)
+
+
+class StatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(2)
+        ]
+
+    def user_stats(self, user):
+        return UserStats.objects.get(pk=user.pk)
+
+    def test_write_paths_update_counters(self):
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.groups[0]
+        )
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        author, reader = self.user_stats(self.author), self.user_stats(
+            self.reader
+        )
+        self.assertEqual((author.posts, author.followers), (1, 1))
+        self.assertEqual((reader.comments, reader.following), (1, 1))
+        group_stats = GroupStats.objects.get(pk=self.groups[0].pk)
+        self.assertEqual(group_stats.posts, 1)
+        self.assertEqual(group_stats.last_activity, comment.pub_date)
+        post.group = self.groups[1]
+        post.save()
+        self.assertEqual(GroupStats.objects.get(pk=self.groups[0].pk).posts, 0)
+        self.assertEqual(GroupStats.objects.get(pk=self.groups[1].pk).posts, 1)
+        post.delete()
+        self.assertEqual(self.user_stats(self.author).posts, 0)
+        self.assertEqual(self.user_stats(self.reader).comments, 0)
+
+    def test_missing_row_counted_from_scratch(self):
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f'Пост {i}') for i in range(3)
+        ])
+        self.assertEqual(stats.for_user(self.author.pk).posts, 3)
+        self.assertEqual(self.user_stats(self.author).posts, 3)
+
+    def test_reconcile_fixes_drift(self):
+        Post.objects.create(author=self.author, text='Пост')
+        UserStats.objects.filter(pk=self.author.pk).update(posts=99)
+        out = StringIO()
+        call_command('reconcile_stats', stdout=out)
+        self.assertEqual(self.user_stats(self.author).posts, 1)
+        self.assertIn('UserStats: исправлено строк 2', out.getvalue())
+        self.assertEqual(
+            stats.reconcile(), {'UserStats': 0, 'GroupStats': 0}
+        )
+
+    def test_pages_do_not_count_posts(self):
+        cache.clear()
+        post = Post.objects.create(author=self.author, text='Пост')
+        pages = {
+            reverse('posts:post_detail', args=[post.id]): 'posts_count',
+            reverse('posts:profile', args=[self.author.username]):
+                'post_count',
+        }
+        for url, count_name in pages.items():
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = Client().get(url)
+                self.assertFalse(any(
+                    'COUNT(' in query['sql']
+                    and 'FROM "posts_post"' in query['sql']
+                    for query in queries
+                ))
+                self.assertEqual(response.context[count_name], 1)
@@ -0,0 +1,99 @@
+import random
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .. import suggestions
+from ..follow_graph import Graph
+from ..models import Follow, Suggestion, User
+
+
+class ScoreTests(SimpleTestCase):
+    def test_friends_of_friends_and_co_follows(self):
+        edges = [(1, 2), (2, 3), (4, 2), (4, 5), (6, 5)]
+        graph = Graph.build(0, 7, iter(edges))
+        ranked = [author for _, author in suggestions.score(graph, 1)]
+        self.assertEqual(set(ranked), {3, 5})
+        self.assertEqual(suggestions.score(graph, 3), [])
+
+    @mock.patch('posts.suggestions.MAX_FANOUT', 2)
+    def test_fanout_is_sampled_not_lowest_ids(self):
+        # Пользователь 0 читает 1..5, а каждый из них — ещё и соседа.
+        edges = [(0, author) for author in range(1, 6)] + [
+            (author, author % 5 + 1) for author in range(1, 6)
+        ] + [(author, 10 + author) for author in range(1, 6)]
+        graph = Graph.build(0, 16, iter(sorted(edges)))
+        seen = set()
+        for seed in range(20):
+            ranked = suggestions.score(graph, 0, rng=random.Random(seed))
+            self.assertLessEqual(len(ranked), 4)
+            seen.update(author for _, author in ranked)
+        self.assertEqual(seen, {11, 12, 13, 14, 15})
+        self.assertEqual(
+            suggestions.score(graph, 0), suggestions.score(graph, 0)
+        )
+
+
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user{i}', first_name='Имя')
+            for i in range(4)
+        ]
+        first, second, third, fourth = cls.users
+        Follow.objects.create(user=first, author=second)
+        Follow.objects.create(user=second, author=third)
+        Follow.objects.create(user=second, author=fourth)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.users[0])
+
+    def test_batch_replaces_stored_suggestions(self):
+        Suggestion.objects.create(
+            user=self.users[0], author=self.users[1], score=100
+        )
+        call_command('compute_suggestions', stdout=StringIO())
+        self.assertEqual(
+            set(Suggestion.objects.filter(user=self.users[0])
+                .values_list('author__username', flat=True)),
+            {'user2', 'user3'},
+        )
+
+    def test_served_from_cache_and_refreshed_after_batch(self):
+        followed = [self.users[1].id]
+        self.assertEqual(suggestions.for_user(self.users[0].id, followed), [])
+        suggestions.compute_all()
+        served = suggestions.for_user(self.users[0].id, followed)
+        self.assertEqual(
+            {author['username'] for author in served}, {'user2', 'user3'}
+        )
+        with self.assertNumQueries(0):
+            suggestions.for_user(self.users[0].id, followed)
+
+    def test_co_follows_computed_once_per_author(self):
+        first, second, third, fourth = self.users
+        Follow.objects.create(user=fourth, author=second)
+        with mock.patch('posts.suggestions.co_followed',
+                        wraps=suggestions.co_followed) as co_followed:
+            suggestions.compute_all()
+        self.assertEqual(
+            sorted(call.args[1] for call in co_followed.call_args_list),
+            [second.id, third.id, fourth.id],
+        )
+
+    def test_panel_skips_followed_authors(self):
+        suggestions.compute_all()
+        Follow.objects.create(user=self.users[0], author=self.users[2])
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [author['username'] for author in response.context['suggestions']],
+            ['user3'],
+        )
+        self.assertContains(response, 'Кого почитать')
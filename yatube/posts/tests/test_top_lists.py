@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+from posts import top_lists
+from posts.models import Group, Post, User
+
+
+@mock.patch('posts.top_lists.TOP_LIST_SIZE', 5)
+class TopListTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='testuser')
+        self.group = Group.objects.create(title='Группа', slug='test-slug')
+        self.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def ids(self, feed='posts', queryset=None):
+        queryset = Post.objects.all() if queryset is None else queryset
+        return [
+            post_id for _, post_id in top_lists.load(feed, queryset)['entries']
+        ]
+
+    def create(self, count, **kwargs):
+        return [
+            Post.objects.create(author=self.user, text=f'Пост {i}', **kwargs)
+            for i in range(count)
+        ]
+
+    def test_list_updated_incrementally(self):
+        posts = self.create(3)
+        self.assertEqual(self.ids(), [post.id for post in reversed(posts)])
+        new_post = self.create(1)[0]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.ids()[0], new_post.id)
+        posts[0].delete()
+        self.assertNotIn(posts[0].id, self.ids())
+
+    def test_list_built_before_write_is_not_stored(self):
+        self.create(2)
+        store = top_lists._store
+        created = []
+
+        def write_then_store(feed, top, version):
+            created.extend(self.create(1))
+            store(feed, top, version)
+
+        with mock.patch('posts.top_lists._store', write_then_store):
+            self.assertEqual(len(self.ids()), 2)
+        self.assertEqual(self.ids()[0], created[0].id)
+
+    def test_rolled_back_post_not_added(self):
+        self.create(1)
+        self.ids()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.create(1)
+            raise RuntimeError
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.ids()), 1)
+
+    def test_group_change_moves_post_between_lists(self):
+        post = self.create(1, group=self.group)[0]
+        group_feed = f'group:{self.group.id}'
+        other_feed = f'group:{self.other_group.id}'
+        self.ids(group_feed, self.group.posts.all())
+        self.ids(other_feed, self.other_group.posts.all())
+        post.group = self.other_group
+        post.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.ids(group_feed), [])
+            self.assertEqual(self.ids(other_feed), [post.id])
+
+    def test_paginator_serves_pages_from_list(self):
+        posts = self.create(7)
+        paginator = top_lists.FeedPaginator(Post.objects.all(), 2, 'posts')
+        self.assertEqual(paginator.count, 7)
+        self.assertEqual(
+            list(paginator.page(1)), [posts[6], posts[5]]
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(list(paginator.page(4)), [posts[0]])
+        self.assertEqual(len(self.ids()), 5)
+
+    def test_invalidate_all_after_bulk_insert(self):
+        self.create(1)
+        self.ids()
+        Post.objects.bulk_create([Post(author=self.user, text='Пачкой')])
+        top_lists.invalidate_all()
+        self.assertEqual(len(self.ids()), 2)
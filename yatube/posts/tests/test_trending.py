@@ -0,0 +1,81 @@
+import time
+
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import trending
+from ..app_settings import TRENDING_HALF_LIFE, TRENDING_WINDOW
+from ..models import Group, Post, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(2)
+        ]
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.groups[i % 2]
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.now = time.time()
+
+    def record(self, post, count, age=0):
+        for _ in range(count):
+            trending.record(post.id, post.group_id, 1, now=self.now - age)
+
+    def test_recent_activity_outweighs_older(self):
+        first, second, third = self.posts
+        self.record(first, 3, age=3 * TRENDING_HALF_LIFE)
+        self.record(second, 2)
+        self.record(third, 1, age=TRENDING_WINDOW + 60)
+        ranking = trending.materialize(now=self.now)
+        self.assertEqual(ranking['posts'], [second.id, first.id])
+        self.assertEqual(
+            [group['slug'] for group in ranking['groups']],
+            ['group-1', 'group-0'],
+        )
+
+    def test_materialized_without_aggregating_comments(self):
+        self.record(self.posts[0], 1)
+        # Единственный запрос — названия групп.
+        with self.assertNumQueries(1):
+            trending.materialize(now=self.now)
+
+    def test_page_shows_ranked_posts(self):
+        self.record(self.posts[0], 1)
+        self.record(self.posts[2], 2)
+        response = Client().get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.posts[2], self.posts[0]],
+        )
+        self.assertContains(response, 'Активные сообщества')
+
+
+class TrendingEventsTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_new_posts_and_comments_are_recorded(self):
+        older = Post.objects.create(author=self.user, text='Старый пост')
+        newer = Post.objects.create(author=self.user, text='Новый пост')
+        self.client.post(
+            reverse('posts:add_comment', args=[older.id]),
+            {'text': 'Комментарий'},
+        )
+        self.assertEqual(
+            trending.materialize()['posts'], [older.id, newer.id]
+        )
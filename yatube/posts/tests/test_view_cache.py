@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+FOLLOW_INDEX_URL = reverse('posts:follow_index')
+
+
+# Списки лент правятся после фиксации транзакции, поэтому тесты идут
+# без общей транзакции.
+class ViewCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='testuser')
+        self.other = User.objects.create_user(username='other')
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='test-slug')
+        self.post = Post.objects.create(
+            author=self.author, text='Тестовый пост', group=self.group
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.other_client = Client()
+        self.other_client.force_login(self.other)
+
+    def assertCachedAndFresh(self, client, url, change, text):
+        with CaptureQueriesContext(connection) as miss:
+            client.get(url)
+        with CaptureQueriesContext(connection) as hit:
+            client.get(url)
+        self.assertLess(len(hit), len(miss))
+        change()
+        self.assertContains(client.get(url), text)
+
+    def test_group_page_purged_on_new_post(self):
+        self.assertCachedAndFresh(
+            self.guest_client,
+            reverse('posts:group_list', args=[self.group.slug]),
+            lambda: Post.objects.create(
+                author=self.user, text='Новый в группе', group=self.group
+            ),
+            'Новый в группе',
+        )
+
+    def test_post_detail_purged_on_comment(self):
+        self.assertCachedAndFresh(
+            self.authorized_client,
+            reverse('posts:post_detail', args=[self.post.id]),
+            lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='Свежий коммент'
+            ),
+            'Свежий коммент',
+        )
+
+    def test_cached_pages_served_without_queries(self):
+        urls = [
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.id]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                with CaptureQueriesContext(connection) as hit:
+                    response = self.guest_client.get(url)
+                self.assertContains(response, 'Тестовый пост')
+                self.assertEqual(len(hit), 0)
+
+    def test_comment_count_fresh_in_feeds(self):
+        pages = {
+            self.guest_client: reverse(
+                'posts:group_list', args=[self.group.slug]
+            ),
+            self.authorized_client: FOLLOW_INDEX_URL,
+        }
+        for client, url in pages.items():
+            client.get(url)
+        for count in (1, 2):
+            Comment.objects.create(
+                post=self.post, author=self.other, text='Коммент'
+            )
+            for client, url in pages.items():
+                with self.subTest(url=url, count=count):
+                    self.assertContains(
+                        client.get(url), f'{count} комментариев'
+                    )
+
+    def test_follow_index_cached_per_user(self):
+        self.assertCachedAndFresh(
+            self.authorized_client,
+            FOLLOW_INDEX_URL,
+            lambda: Post.objects.create(author=self.author, text='От автора'),
+            'От автора',
+        )
+        self.assertNotContains(
+            self.other_client.get(FOLLOW_INDEX_URL), 'От автора'
+        )
+        Follow.objects.create(user=self.other, author=self.author)
+        self.assertContains(
+            self.other_client.get(FOLLOW_INDEX_URL), 'От автора'
+        )
@@ -0,0 +1,200 @@
+"""Списки id свежих постов лент, которые хранятся в кеше.
+
+Для каждой ленты (вся лента, группа, автор) в кеше лежат TOP_LIST_SIZE
+самых новых постов. Сигналы Post правят списки на месте, так что первые
+страницы берутся по id без сортировки таблицы. Массовые вставки сигналов
+не шлют: после них надо вызвать invalidate_all(). Если в списке оказался
+id, которого уже нет в базе (например, после отката транзакции), список
+выбрасывается и собирается заново.
+
+Каждая запись в ленту меняет её версию. Собранный при промахе список
+кладётся в кеш, только если версия за время сборки не поменялась, иначе
+чтение, начатое до записи, спрятало бы новый пост до истечения списка.
+"""
+import time
+
+from core import cache_tags
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .app_settings import TOP_LIST_SIZE, TOP_LIST_TIMEOUT
+
+GENERATION_TAG = 'top_lists'
+LOCK_TIMEOUT = 5
+
+
+def _key(feed):
+    return f'top:{feed}'
+
+
+def _version_key(feed):
+    return f'top:{feed}:version'
+
+
+def feeds(post, group_id=None):
+    group_id = post.group_id if group_id is None else group_id
+    result = ['posts', f'author:{post.author_id}']
+    if group_id is not None:
+        result.append(f'group:{group_id}')
+    return result
+
+
+def _entry(post):
+    return post.pub_date.timestamp(), post.pk
+
+
+def load(feed, queryset):
+    """Список ленты из кеша; при промахе собирается одним запросом."""
+    tag_key = cache_tags.key(GENERATION_TAG)
+    found = cache.get_many([tag_key, _key(feed), _version_key(feed)])
+    generation = found.get(tag_key) or cache_tags.versions(GENERATION_TAG)[0]
+    version = found.get(_version_key(feed))
+    top = found.get(_key(feed))
+    if top is not None and top['generation'] == generation:
+        return top
+    rows = queryset.order_by('-pub_date', '-id').values_list('pub_date', 'id')
+    entries = [
+        (pub_date.timestamp(), post_id)
+        for pub_date, post_id in rows[:TOP_LIST_SIZE]
+    ]
+    top = {
+        'generation': generation,
+        'entries': entries,
+        # Список полный, если в ленте не больше постов, чем в нём.
+        'complete': len(entries) < TOP_LIST_SIZE,
+    }
+    _store(feed, top, version)
+    return top
+
+
+def _store(feed, top, version):
+    """Кладёт собранный список, если с начала сборки в ленту не писали.
+    Занятая блокировка тоже означает запись: тогда список не кладётся."""
+    key = _key(feed)
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, True, LOCK_TIMEOUT):
+        return
+    try:
+        if cache.get(_version_key(feed)) == version:
+            cache.add(key, top, TOP_LIST_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def _update(feed, change):
+    """Меняет версию ленты и правит список, если он уже в кеше. Кто не
+    взял блокировку, просто удаляет список: его пересоберут при следующем
+    чтении."""
+    key = _key(feed)
+    lock_key = f'{key}:lock'
+    cache.set(_version_key(feed), time.time_ns(), TOP_LIST_TIMEOUT)
+    if not cache.add(lock_key, True, LOCK_TIMEOUT):
+        cache.delete(key)
+        return
+    try:
+        top = cache.get(key)
+        if top is not None:
+            change(top)
+            cache.set(key, top, TOP_LIST_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def add(post, feeds_to_update):
+    entry = _entry(post)
+
+    def change(top):
+        entries = [item for item in top['entries'] if item[1] != entry[1]]
+        entries.append(entry)
+        entries.sort(reverse=True)
+        if len(entries) > TOP_LIST_SIZE:
+            top['complete'] = False
+        top['entries'] = entries[:TOP_LIST_SIZE]
+
+    for feed in feeds_to_update:
+        _update(feed, change)
+
+
+def remove(post_id, feeds_to_update):
+    def change(top):
+        top['entries'] = [
+            entry for entry in top['entries'] if entry[1] != post_id
+        ]
+
+    for feed in feeds_to_update:
+        _update(feed, change)
+
+
+def discard(feed):
+    cache.delete(_key(feed))
+
+
+def invalidate_all():
+    cache_tags.touch(GENERATION_TAG)
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор, который берёт страницы из списка ленты, пока они в него
+    помещаются, а дальше откатывается к обычному запросу."""
+
+    def __init__(self, object_list, per_page, feed, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+
+    @cached_property
+    def top(self):
+        return load(self.feed, self.object_list)
+
+    @cached_property
+    def count(self):
+        if self.top['complete']:
+            return len(self.top['entries'])
+        return self.object_list.count()
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        entries = self.top['entries']
+        if top > len(entries) and not self.top['complete']:
+            return super().page(number)
+        ids = [post_id for _, post_id in entries[bottom:top]]
+
+        def fallback():
+            discard(self.feed)
+            return self.object_list[bottom:top]
+
+        return self._get_page(
+            PostsById(self.object_list, ids, fallback), number, self
+        )
+
+
+class PostsById:
+    """Посты по списку id в его порядке. Запрос выполняется при первом
+    обращении, как в api.CursorPage, так что из закешированного блока
+    страницы его не будет. Если части постов уже нет, берётся
+    fallback(), а без него недостающие посты пропускаются."""
+
+    def __init__(self, queryset, ids, fallback=None):
+        self.queryset = queryset
+        self.ids = ids
+        self.fallback = fallback
+
+    @cached_property
+    def posts(self):
+        found = self.queryset.select_related('author', 'group').in_bulk(
+            self.ids
+        )
+        if len(found) < len(self.ids) and self.fallback is not None:
+            return list(self.fallback())
+        return [found[post_id] for post_id in self.ids if post_id in found]
+
+    def __iter__(self):
+        return iter(self.posts)
+
+    def __len__(self):
+        return len(self.posts)
+
+    def __getitem__(self, index):
+        return self.posts[index]
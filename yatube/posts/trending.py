@@ -0,0 +1,96 @@
+"""Популярные посты и активные сообщества.
+
+События (новый комментарий, новый пост) складываются в корзины по
+TRENDING_BUCKET секунд: каждая корзина — словарь счётчиков в кеше,
+который живёт, пока корзина попадает в окно TRENDING_WINDOW. Раз в
+TRENDING_REFRESH секунд корзины окна сводятся в упорядоченные списки с
+затуханием по возрасту (вес события вдвое меньше каждые
+TRENDING_HALF_LIFE секунд). Чтение — одно обращение к кешу, таблицу
+Comment при этом никто не агрегирует.
+"""
+import heapq
+import time
+from collections import Counter
+from operator import itemgetter
+
+from core import cache_tags, stampede
+from django.core.cache import cache
+
+from .app_settings import (TRENDING_BUCKET, TRENDING_GROUPS,
+                           TRENDING_HALF_LIFE, TRENDING_REFRESH,
+                           TRENDING_SIZE, TRENDING_WINDOW)
+from .models import Group
+
+KEY = 'trending'
+COMMENT_WEIGHT = 1.0
+POST_WEIGHT = 1.0
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 20
+
+
+def _bucket(timestamp):
+    return int(timestamp // TRENDING_BUCKET)
+
+
+def _bucket_key(bucket):
+    return f'trending:bucket:{bucket}'
+
+
+def record(post_id, group_id, weight, now=None):
+    """Добавляет событие в текущую корзину. Если корзину долго не
+    удаётся заблокировать, событие теряется: счётчики приблизительные."""
+    key = _bucket_key(_bucket(time.time() if now is None else now))
+    lock_key = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock_key, True, LOCK_TIMEOUT):
+            break
+        time.sleep(0.01)
+    else:
+        return
+    try:
+        counters = cache.get(key) or {'posts': Counter(), 'groups': Counter()}
+        counters['posts'][post_id] += weight
+        if group_id is not None:
+            counters['groups'][group_id] += weight
+        cache.set(key, counters, TRENDING_WINDOW + TRENDING_BUCKET)
+    finally:
+        cache.delete(lock_key)
+
+
+def materialize(now=None):
+    now = time.time() if now is None else now
+    last = _bucket(now)
+    buckets = range(last - TRENDING_WINDOW // TRENDING_BUCKET + 1, last + 1)
+    found = cache.get_many([_bucket_key(bucket) for bucket in buckets])
+    posts = Counter()
+    groups = Counter()
+    for bucket in buckets:
+        counters = found.get(_bucket_key(bucket))
+        if counters is None:
+            continue
+        age = now - (bucket + 1) * TRENDING_BUCKET
+        decay = 0.5 ** (max(0, age) / TRENDING_HALF_LIFE)
+        for post_id, weight in counters['posts'].items():
+            posts[post_id] += weight * decay
+        for group_id, weight in counters['groups'].items():
+            groups[group_id] += weight * decay
+    top_groups = heapq.nlargest(
+        TRENDING_GROUPS, groups.items(), key=itemgetter(1)
+    )
+    titles = Group.objects.in_bulk([group_id for group_id, _ in top_groups])
+    cache_tags.touch(KEY)
+    return {
+        'posts': [
+            post_id for post_id, _ in
+            heapq.nlargest(TRENDING_SIZE, posts.items(), key=itemgetter(1))
+        ],
+        'groups': [
+            {'slug': titles[group_id].slug, 'title': titles[group_id].title}
+            for group_id, _ in top_groups if group_id in titles
+        ],
+    }
+
+
+def current():
+    """Упорядоченные списки: {'posts': [id, ...], 'groups': [...]}"""
+    return stampede.get_or_build(KEY, materialize, TRENDING_REFRESH)
@@ -6,9 +6,15 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending_posts, name='trending'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -17,6 +23,19 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('export/', views.data_export, name='data_export'),
+    path('api/posts/', views.api_index, name='api_index'),
+    path(
+        'api/group/<slug:slug>/',
+        views.api_group_list,
+        name='api_group_list'
+    ),
+    path(
+        'api/profile/<str:username>/',
+        views.api_profile,
+        name='api_profile'
+    ),
+    path('api/follow/', views.api_follow_index, name='api_follow_index'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
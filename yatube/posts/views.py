@@ -1,67 +1,184 @@
+from core.decorators import page_cache, tag_condition, view_cache
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.http import HttpResponseRedirect
+from django.http import (Http404, HttpResponseBadRequest,
+                         HttpResponseRedirect)
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.template.response import TemplateResponse
+from django.utils.functional import SimpleLazyObject
 
-from .app_settings import POSTS_PER_PAGE
+from . import (api, entities, exports, follow_graph, follow_sets, stats,
+               suggestions, trending)
+from .app_settings import COMMENTS_PER_PAGE, POSTS_PER_PAGE
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Post, User
+from .top_lists import FeedPaginator, PostsById
 
 
-def pagination(obj_list, request):
-    paginator = Paginator(obj_list, POSTS_PER_PAGE)
+def _group_page_tags(group_id):
+    return [f'group:{group_id}', 'users']
+
+
+def _group_tags(request, slug):
+    return _group_page_tags(entities.group(slug).id)
+
+
+def _profile_page_tags(author_id):
+    return [f'author:{author_id}', 'groups']
+
+
+def _profile_tags(request, username):
+    tags = _profile_page_tags(entities.user(username).id)
+    if request.user.is_authenticated:
+        tags.extend([
+            f'follows:{request.user.id}', follow_graph.TAG, *suggestions.TAGS
+        ])
+    return tags
+
+
+def _post_page_tags(post_id, author_id):
+    return [f'post:{post_id}', f'author:{author_id}', 'groups', 'users']
+
+
+def _post_tags(request, post_id):
+    return _post_page_tags(post_id, entities.post_author(post_id))
+
+
+def _comment_tags(request, post_id):
+    return [f'post:{post_id}', 'users']
+
+
+def _comments(post_id, cursor=None):
+    return api.CursorPage(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_PER_PAGE,
+        cursor,
+    )
+
+
+def _follow_page_tags(request, context):
+    return [f'follows:{request.user.id}', 'groups', *suggestions.TAGS] + [
+        f'author:{author}' for author in context['authors']
+    ]
+
+
+def pagination(obj_list, request, feed=None):
+    if feed is None:
+        paginator = Paginator(obj_list, POSTS_PER_PAGE)
+    else:
+        paginator = FeedPaginator(obj_list, POSTS_PER_PAGE, feed)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return {'page_obj': page_obj}
 
 
-@cache_page(20, key_prefix='index_page')
+@page_cache(20, key_prefix='index_page')
 def index(request):
     template = 'posts/index.html'
-    context = pagination(Post.objects.all(), request)
+    context = pagination(Post.objects.all(), request, 'posts')
+    context['active_groups'] = trending.current()['groups']
     return render(request, template, context)
 
 
+@view_cache(lambda request, context: [
+    trending.KEY, 'posts', 'groups', 'users'
+] + [f'post:{post_id}' for post_id in context['page_obj'].object_list.ids])
+def trending_posts(request):
+    ranking = trending.current()
+    page_obj = Paginator(ranking['posts'], POSTS_PER_PAGE).get_page(
+        request.GET.get('page')
+    )
+    page_obj.object_list = PostsById(Post.objects.all(), page_obj.object_list)
+    template = 'posts/trending.html'
+    context = {'page_obj': page_obj, 'active_groups': ranking['groups']}
+    return TemplateResponse(request, template, context)
+
+
+@tag_condition(_group_tags)
+@view_cache(lambda request, context: _group_page_tags(context['group'].id))
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = entities.group(slug)
     template = 'posts/group_list.html'
-    context = {'group': group}
-    context.update(pagination(group.posts.all(), request))
-    return render(request, template, context)
+    context = {
+        'group': group,
+        'group_stats': SimpleLazyObject(lambda: stats.for_group(group.id)),
+    }
+    context.update(
+        pagination(group.posts.all(), request, f'group:{group.id}')
+    )
+    return TemplateResponse(request, template, context)
 
 
+@tag_condition(_profile_tags)
+@view_cache(lambda request, context: _profile_page_tags(context['author'].id))
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = entities.user(username)
     post_list = author.posts.all()
-    posts_count = post_list.count()
+    page = pagination(post_list, request, f'author:{author.id}')
+    author_stats = SimpleLazyObject(lambda: stats.for_user(author.id))
     user = request.user
-    following = (user.is_authenticated and Follow.objects.filter(
-        user=user, author=author).exists())
+    following = False
+    suggested = []
+    known_followers = User.objects.none()
+    if user.is_authenticated:
+        followed = follow_sets.load(user.id)
+        following = follow_sets.contains(followed, author.id)
+        suggested = suggestions.for_user(
+            user.id, followed, exclude={author.id}
+        )
+        graph = follow_graph.current()
+        known_followers = User.objects.filter(
+            id__in=graph.known_followers(user.id, author.id)
+        ).order_by('username')[:5]
     template = 'posts/profile.html'
     context = {
         'author': author,
         'post_list': post_list,
-        'post_count': posts_count,
+        'post_count': SimpleLazyObject(lambda: author_stats.posts),
         'following': following,
+        'author_stats': author_stats,
+        'known_followers': known_followers,
+        'suggestions': suggested,
     }
-    context.update(pagination(post_list, request))
-    return render(request, template, context)
+    context.update(page)
+    return TemplateResponse(request, template, context)
 
 
+@tag_condition(_post_tags)
+@view_cache(lambda request, context: _post_tags(request, context['post_id']))
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    # Пост и счётчик нужны только при сборке блока: из кеша страница
+    # отдаётся без запросов.
+    post = SimpleLazyObject(lambda: get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    ))
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
-    posts_count = post.author.posts.count()
+    comments = _comments(post_id)
+    posts_count = SimpleLazyObject(
+        lambda: stats.for_user(entities.post_author(post_id)).posts
+    )
     template = 'posts/post_detail.html'
     context = {
+        'post_id': post_id,
         'post': post,
         'posts_count': posts_count,
         'form': form,
         'comments': comments,
     }
-    return render(request, template, context)
+    return TemplateResponse(request, template, context)
+
+
+@tag_condition(_comment_tags)
+def post_comments(request, post_id):
+    """Следующая страница комментариев HTML-фрагментом."""
+    get_object_or_404(Post.objects.only('id'), pk=post_id)
+    cursor = request.GET.get('cursor')
+    try:
+        cursor = api.decode_cursor(cursor) if cursor else None
+    except api.BadRequest as exc:
+        return HttpResponseBadRequest(str(exc))
+    context = {'comments': _comments(post_id, cursor), 'post_id': post_id}
+    return render(request, 'posts/comment_list.html', context)
 
 
 @login_required
@@ -113,21 +230,25 @@ def add_comment(request, post_id):
 
 
 @login_required
+@view_cache(_follow_page_tags, per_user=True)
 def follow_index(request):
     user = request.user
-    authors = user.follower.values_list('author', flat=True)
+    authors = list(follow_sets.load(user.id))
     posts = Post.objects.filter(author__id__in=authors)
     context = pagination(posts, request)
+    context['authors'] = authors
+    context['suggestions'] = suggestions.for_user(user.id, authors)
     template = 'posts/follow.html'
-    return render(request, template, context)
+    return TemplateResponse(request, template, context)
 
 
 @login_required
 def profile_follow(request, username):
     user = request.user
-    author = get_object_or_404(User, username=username)
+    author = entities.user(username)
     if author != user:
-        Follow.objects.get_or_create(user=user, author=author)
+        if not follow_sets.is_following(user.id, author.id):
+            Follow.objects.get_or_create(user=user, author=author)
         return redirect('posts:profile', username=username)
     return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
 
@@ -135,5 +256,52 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     user = request.user
-    Follow.objects.get(user=user, author__username=username).delete()
+    author = entities.user(username)
+    Follow.objects.get(user=user, author=author).delete()
     return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
+
+
+@login_required
+def data_export(request):
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in exports.FORMATS:
+        raise Http404
+    user = request.user
+    stream = getattr(exports, f'{export_format}_stream')
+    return exports.download_response(
+        request,
+        lambda: stream(user),
+        exports.fingerprint(user, export_format),
+        exports.FORMATS[export_format],
+        f'yatube-{user.username}.{export_format}',
+    )
+
+
+def api_index(request):
+    return api.feed_response(request, Post.objects.all(), ['posts'])
+
+
+def api_group_list(request, slug):
+    group = entities.group(slug)
+    return api.feed_response(
+        request, group.posts.all(), [f'group:{group.id}']
+    )
+
+
+def api_profile(request, username):
+    author = entities.user(username)
+    return api.feed_response(
+        request, author.posts.all(), [f'author:{author.id}']
+    )
+
+
+@api.login_required
+def api_follow_index(request):
+    user = request.user
+    authors = list(follow_sets.load(user.id))
+    return api.feed_response(
+        request,
+        Post.objects.filter(author__id__in=authors),
+        [f'follows:{user.id}'] + [f'author:{author}' for author in authors],
+        private=True,
+    )
@@ -38,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -45,6 +47,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.BatchLoadingMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -129,8 +133,63 @@ APP_YATUBE_POSTS_PER_PAGE = 10
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Версии тегов, дельты, корзины трендов и блокировки должны быть общими
+# для всех воркеров, поэтому с несколькими процессами нужен общий кеш:
+# YATUBE_CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache
+# YATUBE_CACHE_LOCATION=127.0.0.1:11211
+# Без них кеш живёт в памяти процесса и годится только для одного
+# процесса (manage.py check --deploy об этом предупреждает).
+SHARED_CACHE_BACKEND = os.environ.get(
+    'YATUBE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_TIMEOUT': 5,
+            # Версии тегов и то, что читается и переписывается под
+            # блокировкой, копии в процессе не держат.
+            'SHARED_ONLY_PREFIXES': (
+                'tag:', 'follow_graph:', 'follow_set:', 'top:',
+                'trending:bucket:',
+            ),
+        },
+    },
+    'shared': {
+        'BACKEND': SHARED_CACHE_BACKEND,
+        'LOCATION': os.environ.get('YATUBE_CACHE_LOCATION', ''),
+    },
+}
+if SHARED_CACHE_BACKEND.endswith('.LocMemCache'):
+    CACHES['shared']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+INTERNAL_IPS = ['127.0.0.1']
+APP_YATUBE_METRICS_DIR = os.path.join(BASE_DIR, 'var', 'metrics')
+APP_YATUBE_METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN')
+APP_YATUBE_PROFILES_DIR = os.path.join(BASE_DIR, 'var', 'profiles')
+APP_YATUBE_PROFILE_SAMPLE_RATE = 0
+APP_YATUBE_SLOW_QUERY_MS = 100
+APP_YATUBE_REPEATED_QUERY_THRESHOLD = 10
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'core.log_handlers.QueuedRotatingFileHandler',
+            'filename': os.path.join(BASE_DIR, 'var', 'log', 'slow_queries.log'),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'plain',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }